@@ -3,12 +3,17 @@ from __future__ import annotations
 from ..llm import critic_llm
 from ..schemas import CriticOutput
 from ..tools.io_tools import read_json, write_json
+from ..tools.spec_store import store
 from ..tools.actions import apply_token_edits  # we won't use ui/code patches here
+from ..tools.gap_search import next_value, next_values
+from ..tools.roi import KNOB_REGIONS, region_selectors, dirty_regions
+from ..tools.spec_resolver import update_token
+import os
 
 SEVERITY_ORDER = {"minor": 1, "moderate": 2, "serious": 3, "critical": 4}
 
 SYS = """You are the Critic agent.
-You receive QA results (visual similarity 0..1, a11y impact, perf score) plus the current design tokens/ui.
+You receive QA results (visual SSIM similarity 0..1, a11y impact, perf score) plus the current design tokens/ui.
 
 HARD RULES:
 - The phone frame size is LOCKED; never modify spacing.phoneWidth.
@@ -26,6 +31,12 @@ MAX_STEP = 4              # px per loop
 MIN_GAP = 0               # px floor
 MAX_GAP = 200             # px ceiling (safety)
 
+# "llm" (default): the original ±MAX_STEP LLM proposals. "search" (opt-in): deterministic
+# bracketing/parabolic search over (gap, similarity) history; once it has converged,
+# budgets it could not meet are handed back to the LLM critic.
+CRITIC_MODE = os.getenv("CRITIC_MODE")  # overrides hero.tuning.criticMode
+MAX_BATCH_ROUNDS = 4  # wide rounds per critic step when hero.tuning.batch > 1
+
 def _coerce_number(e) -> float | None:
     """Pull the proposed numeric from a TokenEdit (int/float/str)."""
     v = getattr(e, "value_int", None)
@@ -42,7 +53,38 @@ def _coerce_number(e) -> float | None:
             return None
     return None
 
+def _objective(qa_vis: dict, key: str) -> float:
+    """
+    Score the search maximizes: the SSIM of the region `key` moves, else the global one.
+    With several viewports it is always the primary viewport's report, never the
+    per-iteration worst, so the search history stays one function.
+    """
+    qa_vis = (qa_vis.get("viewports") or {}).get(qa_vis.get("primaryViewport")) or qa_vis
+    region = (qa_vis.get("regions") or {}).get(KNOB_REGIONS.get(key, ""))
+    return float(region["ssim"]) if region else float(qa_vis.get("similarity", 0.0))
+
+def _search_step(tuning: dict, key: str, current: int, sim: float, history: list):
+    """
+    Record (current, sim) and pick the next value of `key` by numeric search.
+    Returns (new_value | None, converged, history, note).
+    """
+    if key.lower() == "phonewidth" and tuning.get("lockPhoneWidth", False):
+        return None, True, history, "Skipped search over spacing.phoneWidth (locked)."
+    history = [*history, [current, sim]]
+    nxt, why = next_value(
+        history, MIN_GAP, MAX_GAP, step=MAX_STEP,
+        deadband=float(tuning.get("deadband", 0.0) or 0.0),
+    )
+    if nxt is None:
+        best = max(history, key=lambda p: p[1])
+        return int(best[0]), True, history, f"Search {why}; best {key}={int(best[0])}px (sim {best[1]:.4f})."
+    return int(nxt), False, history, f"Search ({why})"
+
 def critic(state):
+    with store.batch():  # spec writes of one critic step are flushed together, atomically
+        return _critic(state)
+
+def _critic(state):
     ui      = state.get("ui_spec", {}) or {}
     tokens  = state.get("tokens", {}) or {}
     qa_vis  = state.get("qa_visual", {}) or {}
@@ -61,9 +103,16 @@ def critic(state):
     pass_a11y   = maxImpact <= SEVERITY_ORDER.get(a_budget, 1)
     pass_perf   = True if qa_perf.get("error") else (perfScore >= p_budget)
 
+    tuning = ui.get("hero", {}).get("tuning", {}) or {}
+    mode = CRITIC_MODE or tuning.get("criticMode", "llm")
+    if mode == "search" and "similarity" in qa_vis and not state.get("converged"):
+        return _search_critic(state, tokens, tuning, qa_vis, pass_visual and pass_a11y and pass_perf)
+
     # Prepare LLM call (explicitly allow only headlineGap)
     user = f"""
 Current similarity: {sim:.4f} (target {v_budget})
+Worst 8×8 tile (row, col from top-left): {qa_vis.get('worstTile')}
+Per-region SSIM (element crops + background): {qa_vis.get('regions')}
 A11y max impact: {maxImpact} (allowed <= {SEVERITY_ORDER.get(a_budget,1)})
 Perf: {qa_perf}
 
@@ -81,6 +130,7 @@ Do NOT propose any ui_edits or code_patches. Never touch spacing.phoneWidth.
 
     proposed_gap = None
     notes: list[str] = []
+    affected: list[str] = []  # spec paths whose resolved value changed
 
     # Accept only spacing.headlineGap; drop everything else (including phoneWidth)
     for e in (out.token_edits or []):
@@ -111,6 +161,7 @@ Do NOT propose any ui_edits or code_patches. Never touch spacing.phoneWidth.
             # Apply directly (bypass generic applier to avoid other edits sneaking in)
             tokens.setdefault("spacing", {})[ALLOWED_KEY] = new_gap
             write_json("specs/tokens.json", tokens)
+            affected = update_token(f"spacing.{ALLOWED_KEY}", new_gap)
             notes.append(f"{ALLOWED_KEY} {current_gap}px → {new_gap}px (clamped Δ {delta:+}px)")
         else:
             notes.append(f"{ALLOWED_KEY} unchanged at {current_gap}px (already optimal or clamped).")
@@ -125,4 +176,67 @@ Do NOT propose any ui_edits or code_patches. Never touch spacing.phoneWidth.
     if done and proposed_gap is None:
         notes.append("All budgets met. Done.")
 
-    return {"issues": notes or ["No changes proposed."], "score": sim}
+    return {"issues": notes or ["No changes proposed."], "score": sim,
+            "dirty_regions": sorted(dirty_regions(affected))}
+
+def _search_critic(state, tokens, tuning, qa_vis, done):
+    """
+    Numeric-search critic: no LLM call; converges in O(log range) render+QA loops.
+    The objective is the SSIM of the region the knob moves (see roi.KNOB_REGIONS).
+    """
+    key = tuning.get("searchKey", ALLOWED_KEY)
+    current = int(tokens.get("spacing", {}).get(key, 12))
+    history = list(state.get("gap_history") or [])
+    sim = float(qa_vis.get("similarity", 0.0))
+    obj = _objective(qa_vis, key)
+    if done:
+        return {"issues": ["All budgets met. Done."], "score": sim,
+                "gap_history": [*history, [current, obj]], "converged": True}
+
+    batch = int(tuning.get("batch", 1) or 1)
+    if batch > 1 and state.get("preview_url"):
+        new, converged, history, note = _batch_search(state, tuning, key, current, obj, history, batch)
+    else:
+        new, converged, history, note = _search_step(tuning, key, current, obj, history)
+    notes = [note]
+    affected: list[str] = []
+    if new is not None and new != current:
+        tokens.setdefault("spacing", {})[key] = new
+        write_json("specs/tokens.json", tokens)
+        affected = update_token(f"spacing.{key}", new)
+        notes.append(f"{key} {current}px → {new}px")
+        converged = False  # render the chosen value once more before stopping
+    return {"issues": notes, "score": sim, "gap_history": history, "converged": converged,
+            "dirty_regions": sorted(dirty_regions(affected))}
+
+def _batch_search(state, tuning, key, current, sim, history, batch):
+    """
+    Render `batch` candidate values side by side (URL-injected, one context each),
+    for up to MAX_BATCH_ROUNDS rounds, then return the best value to commit.
+    """
+    from ..tools.candidates import evaluate_candidates
+
+    if key.lower() == "phonewidth" and tuning.get("lockPhoneWidth", False):
+        return None, True, history, "Skipped search over spacing.phoneWidth (locked)."
+    from .qa_matrix import primary_viewport
+
+    deadband = float(tuning.get("deadband", 0.0) or 0.0)
+    primary = primary_viewport(state)  # same viewport and target as _objective
+    history = [*history, [current, sim]]
+    why, rounds = "", 0
+    for rounds in range(1, MAX_BATCH_ROUNDS + 1):
+        values, why = next_values(history, batch, MIN_GAP, MAX_GAP, step=MAX_STEP, deadband=deadband)
+        if not values:
+            break
+        scored = evaluate_candidates(
+            state["preview_url"], [{key: v} for v in values], primary["viewport"], primary["target"],
+            regions=region_selectors(state.get("ui_spec")),
+        )
+        history += [[r["spacing"][key], _objective(r, key)] for r in scored]
+    else:
+        why = f"{MAX_BATCH_ROUNDS} rounds"
+    best = max(history, key=lambda p: p[1])
+    converged = not next_values(history, batch, MIN_GAP, MAX_GAP, step=MAX_STEP, deadband=deadband)[0]
+    return int(best[0]), converged, history, (
+        f"Batch search ({why}, {rounds} round(s) × {batch}); best {key}={int(best[0])}px (sim {best[1]:.4f})."
+    )
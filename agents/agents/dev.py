@@ -1,2 +1,15 @@
+from ..tools.preview import get_preview, PREVIEW_MODE
+import os
+
+DEV_URL = "http://localhost:3000"  # `pnpm dev` in site/
+
 def dev(state):
-    return {"code_paths": ["site/src/app/page.tsx"], "preview_url": "http://localhost:3000"}
+    """
+    Point QA at the preview. By default that is the `next dev` server (PREVIEW_URL,
+    else localhost:3000); PREVIEW_MODE=static has the preview manager rebuild and
+    serve the static export instead, only when its inputs changed.
+    """
+    url = os.getenv("PREVIEW_URL")
+    if not url:
+        url = get_preview().ensure() if PREVIEW_MODE == "static" else DEV_URL
+    return {"code_paths": ["site/src/app/page.tsx"], "preview_url": url}
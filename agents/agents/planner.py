@@ -1,6 +1,8 @@
 from ..llm import planner_llm
 from ..schemas import PlanOutput
 from ..tools.io_tools import read_json
+from ..tools.spec_resolver import sync
+from ..tools.roi import dirty_regions
 
 SYS = """You are the planning agent. Read existing spec/tokens/copy and return a short note.
 Do not propose edits; dev and critic will handle that."""
@@ -10,4 +12,12 @@ def planner(state):
     tokens  = read_json("specs/tokens.json")
     copy    = read_json("specs/copy.json")
     _ = planner_llm.structured(SYS, "Plan the next step.", PlanOutput)
-    return {"ui_spec": ui_spec, "tokens": tokens, "copy": copy}
+    out = {"ui_spec": ui_spec, "tokens": tokens, "copy": copy}
+
+    # edits made outside the critic widen (or, for ui/copy changes, reset) the dirty set
+    _, external = sync()
+    if external is None:
+        out["dirty_regions"] = None
+    elif external and state.get("dirty_regions") is not None:
+        out["dirty_regions"] = sorted({*state["dirty_regions"], *dirty_regions(external)})
+    return out
@@ -1,11 +1,17 @@
 from ..tools.qa_tools import run_axe
+from .qa_visual import viewport_of
+from ..tools.preview import with_query
 from time import time
 
 SEVERITY_ORDER = {"minor": 1, "moderate": 2, "serious": 3, "critical": 4}
 
-def qa_accessibility(state):
-    url = state.get("preview_url", "http://localhost:3000")
-    url = f"{url}?a11y={int(time()*1000)}"
-    violations = run_axe(url)
+def summarize(violations):
     max_impact = max([SEVERITY_ORDER.get((v.get("impact") or "minor"), 1) for v in violations] or [0])
     return {"violations": violations, "maxImpact": max_impact}
+
+def qa_accessibility(state):
+    url = state.get("preview_url", "http://localhost:3000")
+    url = with_query(url, {"a11y": int(time() * 1000)})
+    w, h = viewport_of(state)
+    violations = run_axe(url, width=w, height=h)
+    return summarize(violations)
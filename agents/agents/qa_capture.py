@@ -0,0 +1,35 @@
+from ..tools.qa_tools import capture
+from .qa_visual import viewport_of, score_frame
+from .qa_accessibility import summarize
+from ..tools.roi import region_selectors
+from ..tools.preview import with_query
+from time import time
+import asyncio
+
+def _url(state) -> str:
+    url = state.get("preview_url", "http://localhost:3000")
+    return with_query(url, {"t": int(time() * 1000)})  # cache-bust
+
+def qa_capture(state):
+    """One page load feeds both the visual and the accessibility checks."""
+    from .qa_matrix import viewports_of, check_viewports
+
+    if len(viewports_of(state)) > 1:
+        return check_viewports(state, _url(state))
+    w, h = viewport_of(state)
+    regions = region_selectors(state.get("ui_spec"))
+    frame, violations, boxes = capture(_url(state), width=w, height=h, regions=regions)
+    return {"qa_visual": score_frame(state, frame, boxes), "qa_a11y": summarize(violations)}
+
+async def aqa_capture(state):
+    """Async `qa_capture`; the SSIM scoring runs in a worker thread."""
+    from ..tools.qa_async import acapture
+    from .qa_matrix import viewports_of, acheck_viewports
+
+    if len(viewports_of(state)) > 1:
+        return await acheck_viewports(state, _url(state))
+    w, h = viewport_of(state)
+    regions = region_selectors(state.get("ui_spec"))
+    frame, violations, boxes = await acapture(_url(state), width=w, height=h, regions=regions)
+    visual = await asyncio.to_thread(score_frame, state, frame, boxes)
+    return {"qa_visual": visual, "qa_a11y": summarize(violations)}
@@ -0,0 +1,134 @@
+from ..tools.qa_tools import capture
+from ..tools.roi import region_selectors
+from ..tools.artifacts import flush
+from .qa_visual import viewport_of, score_frame
+from .qa_accessibility import summarize
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.util import Finalize
+from statistics import mean
+import asyncio, atexit, os, threading
+
+# Multi-viewport QA: hero.acceptance.viewports lists breakpoints, each optionally
+# with its own target image:
+#   "viewports": [{"name": "desktop", "viewport": [1920, 1080]},
+#                 {"name": "mobile", "viewport": [390, 844], "target": "assets/target/hero-mobile.png"}]
+# Every viewport is captured, diffed and axe-checked in a worker process that keeps
+# its own browser for the whole run; results are aggregated into qa_visual/qa_a11y
+# (worst-case score at the top level, per-viewport breakdowns under "viewports").
+
+WORKERS = int(os.getenv("QA_VIEWPORT_WORKERS", "0"))  # 0 = one per viewport, up to cpu_count
+
+def viewports_of(state) -> list[dict]:
+    """[{name, viewport: (w, h), target}], falling back to the single acceptance viewport."""
+    ui = state.get("ui_spec", {}) or {}
+    default_target = state.get("target_image", "assets/target/hero.png")
+    out = []
+    for i, vp in enumerate(ui.get("hero", {}).get("acceptance", {}).get("viewports") or []):
+        if isinstance(vp, (list, tuple)):
+            vp = {"viewport": vp}
+        w, h = vp["viewport"]
+        out.append({
+            "name": vp.get("name") or f"{w}x{h}",
+            "viewport": (int(w), int(h)),
+            "target": vp.get("target") or default_target,
+        })
+    if not out:
+        w, h = viewport_of(state)
+        out.append({"name": f"{w}x{h}", "viewport": (w, h), "target": default_target})
+    return out
+
+def primary_viewport(state) -> dict:
+    """The viewport matching acceptance.visual.viewport (else the first): the search critic's objective."""
+    vps = viewports_of(state)
+    size = viewport_of(state)
+    return next((vp for vp in vps if vp["viewport"] == size), vps[0])
+
+# --- worker side -------------------------------------------------------------
+
+def _init_worker():
+    from ..tools.browser_pool import shutdown_pool
+
+    # pool workers leave through multiprocessing's exit path, which skips atexit
+    Finalize(None, shutdown_pool, exitpriority=10)
+
+def _check_viewport(url: str, vp: dict, regions: dict, state: dict) -> dict:
+    """Capture + diff + axe for one viewport (runs in a pool worker)."""
+    w, h = vp["viewport"]
+    frame, violations, boxes = capture(url, width=w, height=h, regions=regions)
+    visual = score_frame(state, frame, boxes, size=(w, h), target_rel=vp["target"], name=vp["name"])
+    flush()  # debug artifacts must be on disk before the result is reported
+    return {"qa_visual": {"viewport": [w, h], **visual}, "qa_a11y": summarize(violations)}
+
+# --- parent side -------------------------------------------------------------
+
+_executor: ProcessPoolExecutor | None = None
+_lock = threading.Lock()
+
+def get_executor(n: int) -> ProcessPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            workers = WORKERS or max(1, min(n, os.cpu_count() or 1))
+            # spawn: forking a parent that already runs Playwright threads isn't safe
+            _executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=get_context("spawn"), initializer=_init_worker,
+            )
+        return _executor
+
+def shutdown_matrix():
+    global _executor
+    with _lock:
+        ex, _executor = _executor, None
+    if ex:
+        ex.shutdown(wait=True)
+
+atexit.register(shutdown_matrix)
+
+def _jobs(state, url: str):
+    """(viewport, picklable per-viewport state) for each viewport."""
+    prev = (state.get("qa_visual") or {}).get("viewports") or {}
+    base = {"ui_spec": state.get("ui_spec"), "dirty_regions": state.get("dirty_regions")}
+    return [(vp, {**base, "qa_visual": prev.get(vp["name"])}) for vp in viewports_of(state)]
+
+def aggregate(results: dict[str, dict], primary: str) -> dict:
+    """
+    Worst-viewport visual report on top (so the budget check stays worst-case), plus
+    breakdowns. The worst viewport can change between iterations, so the search
+    critic scores `primaryViewport`'s report instead (see critic._objective).
+    """
+    sims = {name: r["qa_visual"]["similarity"] for name, r in results.items()}
+    worst = min(sims, key=sims.get)
+    qa_visual = {
+        **results[worst]["qa_visual"],
+        "similarity": sims[worst],
+        "meanSimilarity": round(mean(sims.values()), 4),
+        "worstViewport": worst,
+        "primaryViewport": primary,
+        "viewports": {name: r["qa_visual"] for name, r in results.items()},
+    }
+    qa_a11y = {
+        "violations": [{**v, "viewport": name} for name, r in results.items() for v in r["qa_a11y"]["violations"]],
+        "maxImpact": max(r["qa_a11y"]["maxImpact"] for r in results.values()),
+        "viewports": {name: r["qa_a11y"] for name, r in results.items()},
+    }
+    return {"qa_visual": qa_visual, "qa_a11y": qa_a11y}
+
+def check_viewports(state, url: str) -> dict:
+    """Run every viewport in the process pool; returns {"qa_visual", "qa_a11y"}."""
+    jobs = _jobs(state, url)
+    regions = region_selectors(state.get("ui_spec"))
+    ex = get_executor(len(jobs))
+    futures = {vp["name"]: ex.submit(_check_viewport, url, vp, regions, st) for vp, st in jobs}
+    return aggregate({name: f.result() for name, f in futures.items()}, primary_viewport(state)["name"])
+
+async def acheck_viewports(state, url: str) -> dict:
+    """Async `check_viewports`: awaits the worker processes without blocking the loop."""
+    jobs = _jobs(state, url)
+    regions = region_selectors(state.get("ui_spec"))
+    ex = get_executor(len(jobs))
+    loop = asyncio.get_running_loop()
+    done = await asyncio.gather(*(
+        loop.run_in_executor(ex, _check_viewport, url, vp, regions, st) for vp, st in jobs
+    ))
+    return aggregate({vp["name"]: r for (vp, _), r in zip(jobs, done)}, primary_viewport(state)["name"])
@@ -1,8 +1,24 @@
 from ..tools.qa_tools import run_lighthouse
+from ..tools.preview import with_query
 from time import time
+import os
+
+ENABLED = os.getenv("QA_PERF", "1") != "0"  # QA_PERF=0 skips Lighthouse (offline runs)
+DISABLED = {"performance": 0, "error": "disabled (QA_PERF=0)"}  # errors don't fail the budget
 
 def qa_perf(state):
+    if not ENABLED:
+        return dict(DISABLED)
     url = state.get("preview_url", "http://localhost:3000")
-    url = f"{url}?perf={int(time()*1000)}"
+    url = with_query(url, {"perf": int(time() * 1000)})
     res = run_lighthouse(url)
     return res  # {"performance": 0..100, maybe "error": "..."}
+
+async def aqa_perf(state):
+    from ..tools.qa_async import arun_lighthouse
+
+    if not ENABLED:
+        return dict(DISABLED)
+    url = state.get("preview_url", "http://localhost:3000")
+    url = with_query(url, {"perf": int(time() * 1000)})
+    return await arun_lighthouse(url)
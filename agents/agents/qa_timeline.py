@@ -0,0 +1,85 @@
+from ..tools.io_tools import read_json
+from ..tools.qa_tools import capture_cues, visual_reports
+from ..tools.preview import with_query
+from .qa_visual import viewport_of
+from statistics import mean
+from time import time
+import asyncio
+
+# Timeline QA: the hero's subheading cycles through specs/copy_timeline.json cues.
+# Enabled by hero.acceptance.timeline in ui_spec.json:
+#   "timeline": {"ssimMin": 0.9, "targets": ["assets/target/cue-0.png", ...]}
+# targets are per cue (in start order); missing entries use the run's target image.
+# One page load: the video is seeked (or the page clock advanced) to each cue's
+# midpoint, with fades off (?qa.fadeMs=0), and all frames are diffed in one batch.
+
+TIMELINE_REL = "specs/copy_timeline.json"
+SKIPPED = {"skipped": True}
+
+def timeline_spec(state) -> dict | None:
+    ui = state.get("ui_spec", {}) or {}
+    return ui.get("hero", {}).get("acceptance", {}).get("timeline")
+
+def cue_points(timeline: dict) -> list[dict]:
+    """Cues sorted by start (as TimedCopy does), each with its end and midpoint in seconds."""
+    cues = sorted(timeline.get("cues") or [], key=lambda c: c["start"])
+    duration = timeline.get("duration")
+    out = []
+    for i, c in enumerate(cues):
+        end = c.get("end")
+        if end is None:
+            end = cues[i + 1]["start"] if i + 1 < len(cues) else (
+                duration if isinstance(duration, (int, float)) else c["start"] + 1)
+        out.append({
+            "index": i,
+            "start": c["start"],
+            "end": end,
+            "mid": round((c["start"] + end) / 2, 3),
+            "subheading": c.get("subheading", ""),
+        })
+    return out
+
+def _jobs(state):
+    """(cues, targets, url, size) for the enabled timeline check."""
+    spec = timeline_spec(state) or {}
+    cues = cue_points(read_json(TIMELINE_REL))
+    default_target = state.get("target_image", "assets/target/hero.png")
+    given = spec.get("targets") or []
+    targets = [(given[i] if i < len(given) else None) or default_target for i in range(len(cues))]
+    url = state.get("preview_url", "http://localhost:3000")
+    url = with_query(url, {"qa.fadeMs": 0, "t": int(time() * 1000)})  # no cross-fades; cache-bust
+    return cues, targets, url, viewport_of(state)
+
+def summarize(cues: list[dict], reports: list[dict], targets: list[str]) -> dict:
+    rows = [
+        {**c, "target": t, "similarity": float(r["similarity"]), "worstTile": r["worstTile"]}
+        for c, r, t in zip(cues, reports, targets)
+    ]
+    if not rows:
+        return {"cues": []}
+    worst = min(rows, key=lambda r: r["similarity"])
+    return {
+        "cues": rows,
+        "minSimilarity": worst["similarity"],
+        "meanSimilarity": round(mean(r["similarity"] for r in rows), 4),
+        "worstCue": worst["index"],
+    }
+
+def qa_timeline(state):
+    """Per-cue similarity for the copy timeline, or {"skipped": True} when not enabled."""
+    if not timeline_spec(state):
+        return SKIPPED
+    cues, targets, url, (w, h) = _jobs(state)
+    frames = capture_cues(url, cues, width=w, height=h)
+    return summarize(cues, visual_reports(frames, targets, size=(w, h)), targets)
+
+async def aqa_timeline(state):
+    """Async `qa_timeline`; the batch diff runs in a worker thread."""
+    from ..tools.qa_async import acapture_cues
+
+    if not timeline_spec(state):
+        return SKIPPED
+    cues, targets, url, (w, h) = _jobs(state)
+    frames = await acapture_cues(url, cues, width=w, height=h)
+    reports = await asyncio.to_thread(visual_reports, frames, targets, (w, h))
+    return summarize(cues, reports, targets)
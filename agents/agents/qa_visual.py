@@ -1,21 +1,63 @@
-from ..tools.qa_tools import screenshot, visual_diff
-from ..tools.io_tools import root_path
+from ..tools.qa_tools import screenshot, visual_report
+from ..tools.artifacts import DEBUG, save_png_async, dissimilarity_image
+from ..tools.roi import score_regions
+from ..tools.preview import with_query
 from time import time
 
-def qa_visual(state):
+ACTUAL_REL = "agents/.tmp/actual.png"
+DIFF_REL   = "agents/.tmp/diff.png"
+
+def viewport_of(state) -> tuple[int, int]:
+    """The primary viewport: acceptance.visual.viewport, else the first acceptance.viewports entry."""
     ui = state.get("ui_spec", {}) or {}
-    viewport = ui.get("hero", {}).get("acceptance", {}).get("visual", {}).get("viewport", [1280, 720])
-    w, h = viewport
-    actual_rel = "agents/.tmp/actual.png"
-    diff_rel   = "agents/.tmp/diff.png"
-    target_rel = state.get("target_image", "assets/target/hero.png")
+    acceptance = ui.get("hero", {}).get("acceptance", {}) or {}
+    vp = acceptance.get("visual", {}).get("viewport")
+    if vp is None and acceptance.get("viewports"):
+        vp = acceptance["viewports"][0]["viewport"]
+    w, h = vp or [1280, 720]
+    return int(w), int(h)
 
-    url = state.get("preview_url", "http://localhost:3000")
-    url = f"{url}?t={int(time()*1000)}"  # cache-bust
-    screenshot(url, actual_rel, width=w, height=h)
-    similarity, _ = visual_diff(actual_rel, target_rel, diff_rel, size=(w, h))
-    return {
-        "similarity": float(similarity),
-        "actual": str(root_path(actual_rel)),
-        "diff":   str(root_path(diff_rel)),
+def ssim_budget(state) -> float:
+    ui = state.get("ui_spec", {}) or {}
+    return float(ui.get("hero", {}).get("acceptance", {}).get("visual", {}).get("ssimMin", 0.99))
+
+def score_frame(state, frame, boxes: dict | None = None, size=None, target_rel: str | None = None,
+                name: str | None = None):
+    """
+    Diff a captured frame (in-memory array or image path) against the target.
+    With element boxes, per-region scores (plus "background") are added under "regions".
+    actual.png / diff.png are written in the background, and only when the
+    budget fails or QA_DEBUG_ARTIFACTS=1. size/target_rel/name override the primary
+    viewport, its target and the artifact suffix (see agents/qa_matrix.py).
+    """
+    w, h = size or viewport_of(state)
+    target_rel = target_rel or state.get("target_image", "assets/target/hero.png")
+    rep, ssim_map = visual_report(frame, target_rel, size=(w, h))
+    out = {
+        "similarity": float(rep["similarity"]),
+        "tiles": rep["tiles"],          # 8×8 SSIM grid, row-major from top-left
+        "worstTile": rep["worstTile"],
     }
+    if boxes and not isinstance(frame, str):
+        # after a token edit only the regions it can move are re-scored; the rest carry over
+        dirty = state.get("dirty_regions")
+        prev = (state.get("qa_visual") or {}).get("regions")
+        only = set(dirty) if dirty is not None and prev else None
+        regions = score_regions(frame, target_rel, (w, h), boxes, ssim_map, only=only)
+        if only is not None:
+            regions = {**{k: v for k, v in prev.items() if k in boxes}, **regions}
+        out["regions"] = regions
+    if DEBUG or out["similarity"] < ssim_budget(state):
+        actual_rel, diff_rel = (ACTUAL_REL, DIFF_REL) if name is None else (
+            ACTUAL_REL.replace(".png", f"_{name}.png"), DIFF_REL.replace(".png", f"_{name}.png"))
+        if not isinstance(frame, str):
+            out["actual"], _ = save_png_async(frame, actual_rel)
+        out["diff"], _ = save_png_async(dissimilarity_image(ssim_map), diff_rel)
+    return out
+
+def qa_visual(state):
+    w, h = viewport_of(state)
+    url = state.get("preview_url", "http://localhost:3000")
+    url = with_query(url, {"t": int(time() * 1000)})  # cache-bust
+    actual = screenshot(url, ACTUAL_REL, width=w, height=h)
+    return {**score_frame(state, ACTUAL_REL), "actual": actual}
@@ -0,0 +1,202 @@
+"""
+Batch tuning: python -m agents.batch MANIFEST [--workers N] [--out PATH]
+
+Runs one independent graph per manifest entry in a process pool. A manifest is a
+JSON list of runs (or {"runs": [...], "recursionLimit": 25}):
+
+  [{"name": "default", "brief": "Build SeeMe hero", "target": "assets/target/hero.png"},
+   {"name": "tight", "target": "assets/target/hero-tight.png",
+    "overrides": {"specs/tokens.json": {"/spacing/headlineGap": 12}}}]
+
+overrides map a spec file to {JSON pointer: value} edits applied before the run.
+Every run gets a workspace under storage/batch/<batch id>/<name>/ holding its own
+copy of specs/ and its debug artifacts (SEEME_WORKSPACE, see tools/io_tools.py),
+plus its own preview server on a free port (PREVIEW_MODE=static, the batch
+default). Preview builds, targets, QA results, LLM responses and checkpoints are
+shared on disk. The consolidated report
+(scores, iterations, per-node time) goes to <batch dir>/report.json.
+Code patches from the critic edit site/ itself and are not isolated per run.
+"""
+from .tools.io_tools import ROOT, WORKSPACE_ENV, root_path
+from .checkpoint import new_run_id
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from pathlib import Path
+from time import perf_counter
+import argparse, json, os, re, shutil, sys
+
+BATCH_REL = "storage/batch"
+DEFAULT_BRIEF = "Build SeeMe hero"
+DEFAULT_TARGET = "assets/target/hero.png"
+RECURSION_LIMIT = 25
+
+def load_manifest(path: str) -> tuple[list[dict], int]:
+    """(runs with unique names, brief/target defaults filled in, recursion limit)."""
+    data = json.loads(Path(path).read_text("utf-8-sig"))
+    runs = data.get("runs", []) if isinstance(data, dict) else data
+    limit = int(data.get("recursionLimit", RECURSION_LIMIT)) if isinstance(data, dict) else RECURSION_LIMIT
+    out, seen = [], set()
+    for i, r in enumerate(runs):
+        name = re.sub(r"[^A-Za-z0-9_.-]+", "-", str(r.get("name") or f"run{i}"))
+        while name in seen:
+            name += f"-{i}"
+        seen.add(name)
+        out.append({
+            "name": name,
+            "brief": r.get("brief", DEFAULT_BRIEF),
+            "target": r.get("target", DEFAULT_TARGET),
+            "overrides": r.get("overrides") or {},
+        })
+    return out, limit
+
+# --- worker side -------------------------------------------------------------
+
+def _prepare_workspace(ws: Path, overrides: dict):
+    """Copy the repo specs into the workspace and apply the run's pointer overrides."""
+    from .tools.io_tools import read_json, write_json
+    from .tools.spec_store import store, compile_pointer, set_pointer
+
+    shutil.copytree(ROOT / "specs", ws / "specs", dirs_exist_ok=True)
+    with store.batch():
+        for rel, edits in overrides.items():
+            doc = read_json(rel)
+            for pointer, value in edits.items():
+                set_pointer(doc, compile_pointer(pointer), value)
+            write_json(rel, doc)
+
+def _node_totals(run_id: str) -> dict:
+    from .history import load
+
+    totals: dict[str, float] = {}
+    for e in load(run_id):
+        for node, ms in (e.get("timings_ms") or {}).items():
+            totals[node] = round(totals.get(node, 0.0) + ms, 1)
+    return totals
+
+def _run_one(job: dict, batch_id: str, ws: str, recursion_limit: int) -> dict:
+    """One graph run in its own workspace (a fresh worker process per run)."""
+    os.environ[WORKSPACE_ENV] = ws  # before any spec is read
+    from .graph import build_graph
+    from .checkpoint import run_config, sqlite_checkpointer
+    from .history import RunHistory
+    from .tools.browser_pool import shutdown_pool
+    from .tools.perf_runner import shutdown_perf_runner
+    from .agents.qa_matrix import shutdown_matrix
+    from .tools.preview import shutdown_preview
+
+    run_id = f"{batch_id}-{job['name']}"
+    init = {"brief": job["brief"], "target_image": job["target"]}
+    res = {"name": job["name"], "run": run_id, "brief": job["brief"], "target": job["target"], "workspace": ws}
+    t0 = perf_counter()
+    history = RunHistory(run_id, init)
+    try:
+        _prepare_workspace(Path(ws), job["overrides"])
+        with sqlite_checkpointer() as saver:
+            app = build_graph(checkpointer=saver)
+            for delta in app.stream(init, config=run_config(run_id, recursion_limit)):
+                history.observe(delta)
+    except Exception as e:  # one failing run doesn't sink the batch
+        res["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        shutdown_pool()
+        shutdown_perf_runner()
+        shutdown_matrix()
+        shutdown_preview()
+
+    s = history.state
+    vis, a11y, perf, tl = (s.get(k) or {} for k in ("qa_visual", "qa_a11y", "qa_perf", "qa_timeline"))
+    res.update({
+        "iterations": history.iteration,
+        "similarity": vis.get("similarity"),
+        "maxImpact": a11y.get("maxImpact"),
+        "performance": perf.get("performance"),
+        "timelineMin": tl.get("minSimilarity"),
+        "score": s.get("score"),
+        "converged": s.get("converged"),
+        "issues": s.get("issues"),
+        "elapsed_s": round(perf_counter() - t0, 3),
+        "nodes_ms": _node_totals(run_id),
+    })
+    return res
+
+# --- parent side -------------------------------------------------------------
+
+def run_batch(runs: list[dict], workers: int, recursion_limit: int = RECURSION_LIMIT,
+              batch_id: str | None = None) -> dict:
+    """Run every manifest entry in a spawn process pool; returns the consolidated report."""
+    batch_id = batch_id or new_run_id()
+    batch_dir = root_path(BATCH_REL, batch_id)
+    workers = max(1, min(workers, len(runs) or 1))
+    t0 = perf_counter()
+    results = {}
+    # spawn (Playwright threads don't survive fork); one run per process keeps
+    # module-level state (spec store, preview server, browsers) per workspace
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"), max_tasks_per_child=1) as ex:
+        futures = {
+            ex.submit(_run_one, job, batch_id, str(batch_dir / job["name"]), recursion_limit): job["name"]
+            for job in runs
+        }
+        for f in as_completed(futures):
+            name = futures[f]
+            try:
+                results[name] = f.result()
+            except Exception as e:  # the worker process itself died
+                results[name] = {"name": name, "error": f"{type(e).__name__}: {e}"}
+            r = results[name]
+            print(f"[{len(results)}/{len(runs)}] {name}: "
+                  + (r["error"] if r.get("error") else f"similarity={r.get('similarity')} in {r.get('elapsed_s')}s"),
+                  file=sys.stderr, flush=True)
+    wall = perf_counter() - t0
+    busy = sum(r.get("elapsed_s") or 0 for r in results.values())
+    return {
+        "batch": batch_id,
+        "workers": workers,
+        "wall_s": round(wall, 3),
+        "run_s_total": round(busy, 3),
+        "speedup": round(busy / wall, 2) if wall else None,  # ≈ workers when runs overlap fully
+        "failed": sorted(n for n, r in results.items() if r.get("error")),
+        "runs": [results[job["name"]] for job in runs],
+    }
+
+def summary_table(report: dict) -> str:
+    rows = [f"{'run':<24} {'iters':>5} {'ssim':>7} {'a11y':>4} {'perf':>4} {'time s':>8}"]
+    for r in report["runs"]:
+        if r.get("error") and not r.get("iterations"):
+            rows.append(f"{r['name']:<24} error: {r['error']}")
+            continue
+        sim = "-" if r.get("similarity") is None else f"{r['similarity']:.4f}"
+        rows.append(f"{r['name']:<24} {r.get('iterations', 0):>5} {sim:>7} "
+                    f"{r.get('maxImpact')!s:>4} {r.get('performance')!s:>4} {r.get('elapsed_s', 0):>8.1f}")
+    rows.append(f"{report['workers']} workers, {report['wall_s']:.1f}s wall, "
+                f"{report['run_s_total']:.1f}s of runs (×{report['speedup']})")
+    return "\n".join(rows)
+
+def main():
+    ap = argparse.ArgumentParser(description="Run the SeeMe tuning loop for many briefs/targets in parallel.")
+    ap.add_argument("manifest", help="JSON list of {name, brief, target, overrides}")
+    ap.add_argument("--workers", type=int, default=int(os.getenv("BATCH_WORKERS", "0")) or (os.cpu_count() or 1),
+                    help="worker processes (default: BATCH_WORKERS, else cpu_count)")
+    ap.add_argument("--out", metavar="PATH", help="report path (default: storage/batch/<id>/report.json)")
+    args = ap.parse_args()
+
+    # identical prompts across a batch's runs are answered once (set LLM_MODE=live to opt out)
+    os.environ.setdefault("LLM_MODE", "cache")
+    # each run serves its own workspace's specs; one shared `next dev` can't
+    os.environ.setdefault("PREVIEW_MODE", "static")
+    runs, limit = load_manifest(args.manifest)
+    if not runs:
+        sys.exit("manifest has no runs")
+    batch_id = new_run_id()
+    print(f"batch {batch_id}: {len(runs)} runs", file=sys.stderr)
+    report = run_batch(runs, args.workers, limit, batch_id)
+
+    out = Path(args.out) if args.out else root_path(BATCH_REL, batch_id, "report.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(summary_table(report))
+    print(f"report: {out}")
+    sys.exit(1 if report["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Offline benchmark suite: python -m agents.bench [--save-baseline | --baseline PATH]
+
+Serves bench/fixture over a local HTTP server, stubs the LLM (LLM_MODE=stub), uses the
+numeric-search critic (CRITIC_MODE=search), skips Lighthouse (QA_PERF=0) and the
+QA result cache (QA_CACHE=0), then times:
+  visual_diff at 1280x720 and 1920x1080, screenshot capture, axe,
+  one full graph iteration (cold and warm) and time-to-convergence.
+The graph run edits a throwaway copy of specs/ (SEEME_WORKSPACE), never the repo's.
+Results are written as JSON and compared against a saved baseline. Nothing is
+fetched: the axe and graph benchmarks need a local axe-core build (AXE_PATH, or the
+agents/.cache copy a prior online QA run leaves) and exit early without one.
+"""
+import os
+
+# must be set before any agents module reads them at import time
+os.environ["LLM_MODE"] = "stub"
+os.environ["QA_PERF"] = "0"
+os.environ["QA_CACHE"] = "0"
+os.environ["CRITIC_MODE"] = "search"  # the convergence benchmark times the numeric search
+os.environ["AXE_DOWNLOAD"] = "0"  # never fetch axe-core from the CDN mid-benchmark
+
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from statistics import median
+import argparse, json, platform, shutil, sys, tempfile, threading, time
+
+import numpy as np
+from PIL import Image
+
+from ..tools.io_tools import ROOT, WORKSPACE_ENV, root_path, read_json, write_json, ensure_dir
+
+FIXTURE = Path(__file__).resolve().parent / "fixture"
+OUT_REL = "agents/.tmp/bench"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+TOKENS_REL = "specs/tokens.json"
+
+# --- fixture server --------------------------------------------------------
+
+class _Handler(SimpleHTTPRequestHandler):
+    """Static fixture files, plus /tokens.json from the run's specs so critic edits show up."""
+
+    def translate_path(self, path):
+        if path.split("?", 1)[0] == "/tokens.json":
+            return str(root_path(TOKENS_REL))
+        return super().translate_path(path)
+
+    def end_headers(self):
+        self.send_header("Cache-Control", "no-store")
+        super().end_headers()
+
+    def log_message(self, *args):
+        pass
+
+def serve_fixture():
+    """Start the fixture server on a free port; returns (server, base url)."""
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), partial(_Handler, directory=str(FIXTURE)))
+    threading.Thread(target=srv.serve_forever, name="bench-http", daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}/"
+
+# --- timing ----------------------------------------------------------------
+
+def _timeit(fn, repeat: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        fn()
+    runs = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t)
+    return {"median_s": round(median(runs), 5), "min_s": round(min(runs), 5), "runs": len(runs)}
+
+def _synthetic_pair(size) -> tuple[str, str]:
+    """Deterministic target/actual PNGs (gradient + texture, actual shifted by 6px)."""
+    w, h = size
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:h, 0:w]
+    base = (x / w * 180 + y / h * 60)[..., None] + rng.normal(0, 12, (h, w, 1))
+    img = np.clip(np.repeat(base, 3, axis=2), 0, 255).astype(np.uint8)
+    img[h // 3: h // 3 + h // 8, w // 4: 3 * w // 4] = 255  # a "headline" block
+    rels = (f"{OUT_REL}/target_{w}x{h}.png", f"{OUT_REL}/actual_{w}x{h}.png")
+    for rel, arr in zip(rels, (img, np.roll(img, 6, axis=0))):
+        p = root_path(rel); ensure_dir(p)
+        Image.fromarray(arr).save(p)
+    return rels
+
+# --- benchmarks ------------------------------------------------------------
+
+def bench_visual_diff(size, repeat: int) -> dict:
+    from ..tools.qa_tools import visual_diff
+
+    target, actual = _synthetic_pair(size)
+    out = f"{OUT_REL}/diff_{size[0]}x{size[1]}.png"
+    return _timeit(lambda: visual_diff(actual, target, out, size=size), repeat)
+
+def bench_screenshot(url: str, size, repeat: int) -> dict:
+    from ..tools.qa_tools import screenshot
+
+    return _timeit(lambda: screenshot(url, f"{OUT_REL}/screenshot.png", *size), repeat)
+
+def bench_axe(url: str, size, repeat: int) -> dict:
+    from ..tools.qa_tools import run_axe
+
+    return _timeit(lambda: run_axe(url, *size), repeat)
+
+def bench_graph(url: str, size, start_gap: int, target_gap: int, max_iterations: int) -> dict:
+    """
+    Run the graph from `start_gap` against a target rendered at `target_gap`.
+    Returns per-iteration wall times (cold first iteration, warm median) and convergence.
+    """
+    from ..graph import build_graph
+    from ..tools.qa_tools import screenshot
+
+    target_rel = f"{OUT_REL}/target_gap{target_gap}_{size[0]}x{size[1]}.png"
+    screenshot(f"{url}?spacing.headlineGap={target_gap}", target_rel, *size)
+
+    tokens = read_json(TOKENS_REL)
+    tokens.setdefault("spacing", {})["headlineGap"] = start_gap
+    write_json(TOKENS_REL, tokens)  # the benchmark workspace's copy (see main)
+
+    app = build_graph()
+    init = {"brief": "benchmark", "target_image": target_rel}
+    config = {"recursion_limit": 4 * max_iterations + 4}  # plan, dev, qa, critic per iteration
+    marks, last = [], {}
+    t0 = time.perf_counter()
+    for delta in app.stream(init, config=config):
+        if "critic" in delta:
+            marks.append(time.perf_counter())
+            last = delta["critic"] or {}
+            if last.get("converged"):
+                break  # later loops would hand unmet budgets to the (stubbed) LLM critic
+    total = time.perf_counter() - t0
+    iters = [b - a for a, b in zip([t0, *marks], marks)]
+    history = last.get("gap_history") or []
+    best = max(history, key=lambda p: p[1]) if history else None
+    return {
+        "graph_iteration_cold": {"median_s": round(iters[0], 5), "min_s": round(iters[0], 5), "runs": 1},
+        "graph_iteration_warm": {
+            "median_s": round(median(iters[1:]), 5), "min_s": round(min(iters[1:]), 5), "runs": len(iters) - 1,
+        } if len(iters) > 1 else None,
+        "time_to_convergence": {"median_s": round(total, 5), "min_s": round(total, 5), "runs": 1},
+        "convergence": {
+            "iterations": len(iters),
+            "converged": bool(last.get("converged")),
+            "best_gap": int(best[0]) if best else None,
+            "target_gap": target_gap,
+            "score": last.get("score"),
+        },
+    }
+
+# --- baseline --------------------------------------------------------------
+
+def compare(results: dict, baseline: dict, tolerance: float, floor_s: float = 0.005) -> list[str]:
+    """Metrics whose median grew by more than `tolerance` (and `floor_s` absolute) vs the baseline."""
+    out = []
+    for name, cur in results["metrics"].items():
+        base = baseline.get("metrics", {}).get(name)
+        if not cur or not base or "median_s" not in cur or "median_s" not in base:
+            continue
+        a, b = cur["median_s"], base["median_s"]
+        if a > b * (1 + tolerance) and a - b > floor_s:
+            out.append(f"{name}: {b:.4f}s → {a:.4f}s ({(a / b - 1) * 100:+.0f}%)")
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline performance benchmarks for the tuning loop.")
+    ap.add_argument("--out", default=str(root_path(OUT_REL, "results.json")), help="results JSON path")
+    ap.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="baseline JSON to compare against")
+    ap.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown before failing (0.15 = 15%%)")
+    ap.add_argument("--repeat", type=int, default=5, help="timed runs per micro-benchmark")
+    ap.add_argument("--only", default="", help="comma-separated subset: visual,capture,axe,graph")
+    ap.add_argument("--start-gap", type=int, default=8)
+    ap.add_argument("--target-gap", type=int, default=24)
+    ap.add_argument("--max-iterations", type=int, default=30)
+    args = ap.parse_args()
+
+    only = {s.strip() for s in args.only.split(",") if s.strip()} or {"visual", "capture", "axe", "graph"}
+    if only & {"axe", "graph"}:
+        from ..tools.qa_tools import AXE_VERSION, axe_path
+
+        if not axe_path().exists():
+            sys.exit(f"the benchmark runs offline and needs a local axe-core {AXE_VERSION} build: "
+                     f"set AXE_PATH to axe.min.js, or place it at {axe_path()} "
+                     f"(or pass --only visual,capture)")
+    metrics: dict = {}
+    extra: dict = {}
+
+    def run(name, fn):
+        print(f"· {name} …", file=sys.stderr, flush=True)
+        try:
+            res = fn()
+        except Exception as e:  # one broken benchmark (e.g. no browser) doesn't sink the rest
+            res = {"error": f"{type(e).__name__}: {e}"}
+        if name == "graph":
+            if "error" in res:
+                metrics["graph_iteration_cold"] = res
+            else:
+                extra["convergence"] = res.pop("convergence")
+                metrics.update(res)
+        else:
+            metrics[name] = res
+
+    # the graph run edits the specs: give it a throwaway workspace (see tools/io_tools.py)
+    # so specs/tokens.json in the repo is never touched, even if the run is killed
+    ws = tempfile.mkdtemp(prefix="seeme-bench-")
+    shutil.copytree(ROOT / "specs", Path(ws) / "specs")
+    os.environ[WORKSPACE_ENV] = ws
+    srv, url = serve_fixture()
+    os.environ["PREVIEW_URL"] = url
+    size = tuple(read_json("specs/ui_spec.json")["hero"]["acceptance"]["visual"]["viewport"])
+    try:
+        if "visual" in only:
+            for s in ((1280, 720), (1920, 1080)):
+                run(f"visual_diff_{s[0]}x{s[1]}", partial(bench_visual_diff, s, args.repeat))
+        if "capture" in only:
+            run("screenshot", partial(bench_screenshot, url, size, args.repeat))
+        if "axe" in only:
+            run("axe", partial(bench_axe, url, size, args.repeat))
+        if "graph" in only:
+            run("graph", partial(bench_graph, url, size, args.start_gap, args.target_gap, args.max_iterations))
+    finally:
+        srv.shutdown()
+        from ..tools.browser_pool import shutdown_pool
+        shutdown_pool()
+        del os.environ[WORKSPACE_ENV]
+        shutil.rmtree(ws, ignore_errors=True)
+
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "viewport": list(size),
+        },
+        "metrics": metrics,
+        **extra,
+    }
+    out = Path(args.out); out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        Path(args.baseline).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"baseline saved: {args.baseline}", file=sys.stderr)
+        return 0
+    if not Path(args.baseline).exists():
+        print("no baseline; run with --save-baseline to record one", file=sys.stderr)
+        return 0
+    regressions = compare(results, json.loads(Path(args.baseline).read_text("utf-8")), args.tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
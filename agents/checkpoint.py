@@ -0,0 +1,43 @@
+from pathlib import Path
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+import os, sqlite3, uuid
+
+# Durable runs: LangGraph checkpoints (State after every node) in one SQLite file
+# under storage/. A run id is the checkpointer thread_id; `run.py --resume <id>`
+# continues from the last completed node instead of replaying QA and LLM steps.
+
+DEFAULT_PATH = Path(__file__).resolve().parents[1] / "storage" / "checkpoints.sqlite"
+
+def checkpoint_path() -> Path:
+    return Path(os.getenv("CHECKPOINT_PATH") or DEFAULT_PATH)
+
+def new_run_id() -> str:
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+def run_config(run_id: str, recursion_limit: int) -> dict:
+    return {"recursion_limit": recursion_limit, "configurable": {"thread_id": run_id}}
+
+@contextmanager
+def sqlite_checkpointer(path: Path | None = None):
+    """Sync SqliteSaver (WAL, shared across the node worker threads)."""
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    p = path or checkpoint_path()
+    p.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(p, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    try:
+        yield SqliteSaver(conn)
+    finally:
+        conn.close()
+
+@asynccontextmanager
+async def async_sqlite_checkpointer(path: Path | None = None):
+    """AsyncSqliteSaver for graphs driven with astream/ainvoke."""
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    p = path or checkpoint_path()
+    p.parent.mkdir(parents=True, exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(str(p)) as saver:
+        yield saver
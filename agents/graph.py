@@ -2,32 +2,59 @@ from langgraph.graph import StateGraph, END
 from .state import State
 from .agents.planner import planner
 from .agents.dev import dev
-from .agents.qa_visual import qa_visual
-from .agents.qa_accessibility import qa_accessibility
-from .agents.qa_perf import qa_perf
+from .agents.qa_capture import qa_capture, aqa_capture
+from .agents.qa_perf import qa_perf, aqa_perf
+from .agents.qa_timeline import qa_timeline, aqa_timeline
 from .agents.critic import critic
+from .tools.qa_cache import cached
+from .trace import tracer, traced_node
 
-def build_graph():
+def build_graph(async_qa: bool = False, checkpointer=None):
+    """
+    async_qa=True wires async QA nodes (drive the app with astream/ainvoke).
+    checkpointer persists State after every node (see checkpoint.py); runs are then
+    keyed by config["configurable"]["thread_id"].
+    """
     g = StateGraph(State)
 
-    g.add_node("plan", lambda s: planner(s))
-    g.add_node("dev",  lambda s: dev(s))
+    def plan_node(s):
+        tracer.next_iteration()  # each pass through plan starts a new loop iteration
+        return planner(s)
+
+    # every node is timed as a "node" span (no-op unless tracing is on)
+    g.add_node("plan", traced_node("plan", plan_node))
+    g.add_node("dev",  traced_node("dev", dev))
 
     # ✅ Node ids are unique; they write to distinct state keys
-    g.add_node("qa_visual_node", lambda s: {"qa_visual": qa_visual(s)})
-    g.add_node("qa_a11y_node",   lambda s: {"qa_a11y": qa_accessibility(s)})
-    g.add_node("qa_perf_node",   lambda s: {"qa_perf": qa_perf(s)})
+    # (one page load fills both qa_visual and qa_a11y)
+    # QA results are cached on a hash of everything that affects the render
+    if async_qa:
+        async def qa_perf_node(s):
+            return {"qa_perf": await aqa_perf(s)}
+        async def qa_timeline_node(s):
+            return {"qa_timeline": await aqa_timeline(s)}
+        g.add_node("qa_capture_node", traced_node("qa_capture", cached("capture", aqa_capture)))
+        g.add_node("qa_perf_node",    traced_node("qa_perf", cached("perf", qa_perf_node)))
+    else:
+        def qa_perf_node(s):
+            return {"qa_perf": qa_perf(s)}
+        def qa_timeline_node(s):
+            return {"qa_timeline": qa_timeline(s)}
+        g.add_node("qa_capture_node", traced_node("qa_capture", cached("capture", qa_capture)))
+        g.add_node("qa_perf_node",    traced_node("qa_perf", cached("perf", qa_perf_node)))
+    # per-cue captures of the copy timeline (skipped unless acceptance.timeline is set)
+    g.add_node("qa_timeline_node", traced_node("qa_timeline", cached("timeline", qa_timeline_node)))
 
-    g.add_node("critic", lambda s: critic(s))
+    g.add_node("critic", traced_node("critic", critic))
 
     g.set_entry_point("plan")
     g.add_edge("plan", "dev")
-    g.add_edge("dev", "qa_visual_node")
-    g.add_edge("dev", "qa_a11y_node")
+    g.add_edge("dev", "qa_capture_node")
     g.add_edge("dev", "qa_perf_node")
-    g.add_edge("qa_visual_node", "critic")
-    g.add_edge("qa_a11y_node",   "critic")
-    g.add_edge("qa_perf_node",   "critic")
+    g.add_edge("dev", "qa_timeline_node")
+    g.add_edge("qa_capture_node", "critic")
+    g.add_edge("qa_perf_node",    "critic")
+    g.add_edge("qa_timeline_node", "critic")
 
     def loop_or_end(s: State):
         ui = s.get("ui_spec", {}) or {}
@@ -44,7 +71,11 @@ def build_graph():
         perf_res = s.get("qa_perf",{}) or {}
         perf_ok = (int(perf_res.get("performance", 0)) >= p) if not perf_res.get("error") else True
 
-        return END if (pass_visual and pass_a11y and perf_ok) else "plan"
+        tl = s.get("qa_timeline") or {}
+        tl_min = (budgets.get("timeline") or {}).get("ssimMin")
+        timeline_ok = tl_min is None or "minSimilarity" not in tl or float(tl["minSimilarity"]) >= float(tl_min)
+
+        return END if (pass_visual and pass_a11y and perf_ok and timeline_ok) else "plan"
 
     g.add_conditional_edges("critic", loop_or_end, {"plan": "plan", END: END})
-    return g.compile()
+    return g.compile(checkpointer=checkpointer)
@@ -0,0 +1,87 @@
+from .tools.io_tools import root_path, read_json
+from .trace import tracer
+from datetime import datetime
+import json
+
+# Compact per-iteration log of a run (storage/history/<run id>.jsonl): the spacing
+# tokens after the critic step, QA scores and node timings. Cheap to scan, and
+# earlier runs can seed the critic's numeric search (see `seed_points`).
+
+HISTORY_REL = "storage/history"
+
+def history_path(run_id: str):
+    return root_path(HISTORY_REL, f"{run_id}.jsonl")
+
+def load(run_id: str) -> list[dict]:
+    p = history_path(run_id)
+    if not p.exists():
+        return []
+    return [json.loads(line) for line in p.read_text("utf-8").splitlines() if line.strip()]
+
+def seed_points(run_id: str, key: str, target_image: str) -> list[list[float]]:
+    """[[knob px, score], ...] recorded for `key` against the same target in an earlier run."""
+    pts = []
+    for e in load(run_id):
+        s = e.get("search") or {}
+        if s.get("key") == key and e.get("target") == target_image and s.get("value") is not None:
+            pts.append([s["value"], s["score"]])
+    return pts
+
+
+class RunHistory:
+    """Mirrors the graph state from streamed updates and appends one line per critic step."""
+
+    def __init__(self, run_id: str, state: dict | None = None):
+        self.run_id = run_id
+        self.state = dict(state or {})
+        self.iteration = len(load(run_id))  # resumed runs keep counting
+
+    def observe(self, delta: dict):
+        for node, update in delta.items():
+            if isinstance(update, dict):
+                self.state.update(update)  # State has no reducers: every key overwrites
+            if node == "critic":
+                self._append()
+
+    def _entry(self) -> dict:
+        s = self.state
+        vis, a11y, perf = s.get("qa_visual") or {}, s.get("qa_a11y") or {}, s.get("qa_perf") or {}
+        tuning = (s.get("ui_spec") or {}).get("hero", {}).get("tuning", {}) or {}
+        entry = {
+            "run": self.run_id,
+            "iteration": self.iteration,
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "target": s.get("target_image"),
+            # scalar spacing knobs after the critic's edit
+            "spacing": {k: v for k, v in read_json("specs/tokens.json").get("spacing", {}).items()
+                        if isinstance(v, (int, float))},
+            "similarity": vis.get("similarity"),
+            "regions": {k: v.get("ssim") for k, v in (vis.get("regions") or {}).items()},
+            "maxImpact": a11y.get("maxImpact"),
+            "performance": perf.get("performance"),
+            "score": s.get("score"),
+            "converged": s.get("converged"),
+            "issues": s.get("issues"),
+            "timings_ms": dict(tracer.node_ms),
+        }
+        if vis.get("viewports"):
+            entry["viewports"] = {k: v.get("similarity") for k, v in vis["viewports"].items()}
+        tl = s.get("qa_timeline") or {}
+        if tl.get("cues"):
+            entry["timeline"] = [c["similarity"] for c in tl["cues"]]
+        gh = s.get("gap_history") or []
+        if gh:
+            # the value the critic committed to tokens.json (in batch mode gh[-1] is just the
+            # last candidate tried); its score if it was measured, else None (next to try)
+            key = tuning.get("searchKey", "headlineGap")
+            value = entry["spacing"].get(key)
+            scores = [sim for v, sim in gh if v == value]
+            entry["search"] = {"key": key, "value": value, "score": max(scores) if scores else None}
+        return entry
+
+    def _append(self):
+        self.iteration += 1
+        p = history_path(self.run_id)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        with open(p, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self._entry()) + "\n")
@@ -5,71 +5,232 @@ from dotenv import load_dotenv
 # Load the repo-root .env before creating any clients
 load_dotenv(dotenv_path=Path(__file__).resolve().parents[1] / ".env")
 
+import asyncio, threading
 import backoff
+from concurrent.futures import Future
 from typing import Any
 from pydantic import BaseModel, ValidationError
-from openai import OpenAI, APIConnectionError, RateLimitError, BadRequestError
+from openai import OpenAI, AsyncOpenAI, APIConnectionError, RateLimitError, BadRequestError
+from .llm_cache import LLMCache, MODES, ReplayMiss, request_key, stub_response
+from .trace import span, count
 
 DEFAULT_PLANNER = os.getenv("PLANNER_MODEL", "gpt-4o-mini")
 DEFAULT_DEV     = os.getenv("DEV_MODEL",     "gpt-4o-mini")
 DEFAULT_CRITIC  = os.getenv("CRITIC_MODEL",  "gpt-4o-mini")
+LLM_MODE        = os.getenv("LLM_MODE",      "live")
+if LLM_MODE not in MODES:
+    raise RuntimeError(f"LLM_MODE must be one of {MODES}, got {LLM_MODE!r}")
+
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))   # in-flight API calls
+LLM_POOL_SIZE   = int(os.getenv("LLM_POOL_SIZE",   "16"))  # keep-alive HTTP connections
+LLM_TIMEOUT     = float(os.getenv("LLM_TIMEOUT",   "60"))
+
+RETRYABLE = (APIConnectionError, RateLimitError)
+
+_cache = LLMCache()  # one store shared by every agent
+
+# --- Shared clients --------------------------------------------------------
+# Created on first use (importing the graph no longer needs OPENAI_API_KEY) and
+# shared by every agent, with one tuned connection pool per transport.
+
+_lock = threading.Lock()
+_sync_client: OpenAI | None = None
+_sync_limit = threading.BoundedSemaphore(LLM_CONCURRENCY)
+_sync_inflight: dict[str, Future] = {}
+_async_state: dict[asyncio.AbstractEventLoop, dict] = {}
+
+def _api_key() -> str:
+    key = os.environ.get("OPENAI_API_KEY")
+    if not key:
+        raise RuntimeError("OPENAI_API_KEY not set. Create see-me-landing-page/.env and reload.")
+    return key
+
+def _limits():
+    import httpx
+    return httpx.Limits(max_connections=LLM_POOL_SIZE, max_keepalive_connections=LLM_POOL_SIZE)
+
+def sync_client() -> OpenAI:
+    global _sync_client
+    with _lock:
+        if _sync_client is None:
+            import httpx
+            _sync_client = OpenAI(
+                api_key=_api_key(),
+                http_client=httpx.Client(limits=_limits(), timeout=LLM_TIMEOUT),
+                max_retries=0,  # retries are ours (backoff), not stacked on the SDK's
+            )
+        return _sync_client
+
+def _loop_state() -> dict:
+    """Async client, semaphore and in-flight table for the running event loop."""
+    loop = asyncio.get_running_loop()
+    st = _async_state.get(loop)
+    if st is None:
+        import httpx
+        st = _async_state[loop] = {
+            "client": AsyncOpenAI(
+                api_key=_api_key(),
+                http_client=httpx.AsyncClient(limits=_limits(), timeout=LLM_TIMEOUT),
+                max_retries=0,
+            ),
+            "limit": asyncio.Semaphore(LLM_CONCURRENCY),
+            "inflight": {},
+        }
+    return st
+
+def _count_usage(r):
+    usage = getattr(r, "usage", None)
+    if usage is not None:
+        count("llm.prompt_tokens", usage.prompt_tokens or 0)
+        count("llm.completion_tokens", usage.completion_tokens or 0)
+
+@backoff.on_exception(backoff.expo, RETRYABLE, max_time=60)
+def _create(kwargs: dict) -> str:
+    with _sync_limit, span("llm.call", "llm", model=kwargs["model"]):
+        r = sync_client().chat.completions.create(**kwargs)
+    _count_usage(r)
+    return r.choices[0].message.content or ""
+
+@backoff.on_exception(backoff.expo, RETRYABLE, max_time=60)
+async def _acreate(kwargs: dict) -> str:
+    st = _loop_state()
+    async with st["limit"]:
+        with span("llm.call", "llm", model=kwargs["model"]):
+            r = await st["client"].chat.completions.create(**kwargs)
+    _count_usage(r)
+    return r.choices[0].message.content or ""
+
+def _coalesced(key: str, kwargs: dict) -> str:
+    """Identical concurrent requests share one API call."""
+    with _lock:
+        fut = _sync_inflight.get(key)
+        leader = fut is None
+        if leader:
+            fut = _sync_inflight[key] = Future()
+    if not leader:
+        return fut.result()
+    try:
+        fut.set_result(_create(kwargs))
+    except BaseException as e:
+        fut.set_exception(e)
+    finally:
+        with _lock:
+            _sync_inflight.pop(key, None)
+    return fut.result()
+
+async def _acoalesced(key: str, kwargs: dict) -> str:
+    inflight = _loop_state()["inflight"]
+    task = inflight.get(key)
+    if task is None:
+        task = inflight[key] = asyncio.ensure_future(_acreate(kwargs))
+        task.add_done_callback(lambda _: inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+# --- Agent-facing API ------------------------------------------------------
+
+def _structured_messages(system: str, user: str, js: dict):
+    """(primary, retry-after-400, repair-after-invalid-JSON) request variants."""
+    # Satisfy json_object requirement and keep a fallback on 400s
+    sys2  = (system or "").strip() + "\n\nRespond ONLY with a single valid JSON object."
+    user2 = (user   or "").strip() + "\n\nReturn JSON only."
+    primary = dict(
+        messages=[{"role":"system","content":sys2},{"role":"user","content":user2}],
+        response_format={"type":"json_object"},
+        temperature=0.2,
+    )
+    on_bad_request = dict(
+        messages=[{"role":"system","content":sys2},
+                  {"role":"user","content":user2 + "\nFormat your entire reply as a JSON object."}],
+        temperature=0.1,
+    )
+    on_invalid = dict(
+        messages=[
+            {"role":"system","content":sys2},
+            {"role":"user","content":user2},
+            {"role":"assistant","content":"{}"},
+            {"role":"user","content":f"Fix to this JSON schema:\n{js}\nReturn JSON only."}
+        ],
+        response_format={"type":"json_object"},
+        temperature=0.1,
+    )
+    return primary, on_bad_request, on_invalid
 
 class LLM:
-    def __init__(self, model: str):
-        key = os.environ.get("OPENAI_API_KEY")
-        if not key:
-            raise RuntimeError("OPENAI_API_KEY not set. Create see-me-landing-page/.env and reload.")
-        self.client = OpenAI(api_key=key)
+    def __init__(self, model: str, mode: str = LLM_MODE):
         self.model = model
+        self.mode = mode
+
+    def _lookup(self, messages, temperature, response_format, schema):
+        """(key, cached_text | None, kwargs) — stub/replay/cache handling before any network."""
+        if self.mode == "stub":
+            return None, stub_response(response_format, schema), None
+        key = request_key(self.model, messages, temperature, response_format, schema)
+        if self.mode != "live":
+            hit = _cache.get(key, expire=self.mode == "cache")  # replay never deletes recordings
+            if hit is not None:
+                count("llm_cache.hit")
+                return key, hit, None
+            count("llm_cache.miss")
+            if self.mode == "replay":
+                raise ReplayMiss(f"No recorded response for {self.model} request {key[:12]}")
+        kwargs: dict[str, Any] = {"model": self.model, "messages": messages, "temperature": temperature}
+        if response_format:
+            kwargs["response_format"] = response_format
+        return key, None, kwargs
+
+    def _store(self, key: str, txt: str) -> str:
+        if self.mode == "cache":
+            _cache.put(key, self.model, txt)
+        return txt
+
+    def _chat(self, messages: list[dict], temperature: float,
+              response_format: dict | None = None, schema: dict | None = None) -> str:
+        """One chat completion through the cache / replay / stub backend."""
+        key, hit, kwargs = self._lookup(messages, temperature, response_format, schema)
+        if hit is not None:
+            return hit
+        return self._store(key, _coalesced(key, kwargs))
+
+    async def _achat(self, messages: list[dict], temperature: float,
+                     response_format: dict | None = None, schema: dict | None = None) -> str:
+        key, hit, kwargs = self._lookup(messages, temperature, response_format, schema)
+        if hit is not None:
+            return hit
+        return self._store(key, await _acoalesced(key, kwargs))
 
-    @backoff.on_exception(backoff.expo, (APIConnectionError, RateLimitError), max_time=60)
     def complete(self, system: str, user: str) -> str:
-        r = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role":"system","content":system},{"role":"user","content":user}],
+        return self._chat(
+            [{"role":"system","content":system},{"role":"user","content":user}],
+            temperature=0.2,
+        )
+
+    async def acomplete(self, system: str, user: str) -> str:
+        return await self._achat(
+            [{"role":"system","content":system},{"role":"user","content":user}],
             temperature=0.2,
         )
-        return r.choices[0].message.content or ""
 
-    @backoff.on_exception(backoff.expo, (APIConnectionError, RateLimitError), max_time=60)
     def structured(self, system: str, user: str, schema: type[BaseModel]) -> BaseModel:
-        # Satisfy json_object requirement and keep a fallback on 400s
-        sys2  = (system or "").strip() + "\n\nRespond ONLY with a single valid JSON object."
-        user2 = (user   or "").strip() + "\n\nReturn JSON only."
+        js = schema.model_json_schema()
+        primary, on_bad_request, on_invalid = _structured_messages(system, user, js)
         try:
-            r = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role":"system","content":sys2},{"role":"user","content":user2}],
-                response_format={"type":"json_object"},
-                temperature=0.2,
-            )
-            txt = r.choices[0].message.content or "{}"
-            return schema.model_validate_json(txt)
+            return schema.model_validate_json(self._chat(**primary, schema=js) or "{}")
         except BadRequestError:
-            r = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role":"system","content":sys2},
-                          {"role":"user","content":user2 + "\nFormat your entire reply as a JSON object."}],
-                temperature=0.1,
-            )
-            txt = r.choices[0].message.content or "{}"
-            return schema.model_validate_json(txt)
+            return schema.model_validate_json(self._chat(**on_bad_request, schema=js) or "{}")
         except ValidationError:
-            r = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role":"system","content":sys2},
-                    {"role":"user","content":user2},
-                    {"role":"assistant","content":"{}"},
-                    {"role":"user","content":f"Fix to this JSON schema:\n{schema.model_json_schema()}\nReturn JSON only."}
-                ],
-                response_format={"type":"json_object"},
-                temperature=0.1,
-            )
-            txt = r.choices[0].message.content or "{}"
-            return schema.model_validate_json(txt)
+            return schema.model_validate_json(self._chat(**on_invalid, schema=js) or "{}")
+
+    async def astructured(self, system: str, user: str, schema: type[BaseModel]) -> BaseModel:
+        js = schema.model_json_schema()
+        primary, on_bad_request, on_invalid = _structured_messages(system, user, js)
+        try:
+            return schema.model_validate_json(await self._achat(**primary, schema=js) or "{}")
+        except BadRequestError:
+            return schema.model_validate_json(await self._achat(**on_bad_request, schema=js) or "{}")
+        except ValidationError:
+            return schema.model_validate_json(await self._achat(**on_invalid, schema=js) or "{}")
 
-# Instantiate one LLM per agent and export them
+# One handle per agent; they share the clients, pool and cache above
 planner_llm = LLM(DEFAULT_PLANNER)
 dev_llm     = LLM(DEFAULT_DEV)
 critic_llm  = LLM(DEFAULT_CRITIC)
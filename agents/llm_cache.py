@@ -0,0 +1,109 @@
+from pathlib import Path
+from typing import Any
+import hashlib, json, os, sqlite3, threading, time
+
+# Disk-backed cache for chat completions, keyed on everything that shapes the reply.
+#   LLM_MODE=live    always call the API (default)
+#   LLM_MODE=cache   read-through cache (the batch runner's default)
+#   LLM_MODE=replay  cached responses only; a miss is an error (fully offline).
+#                    Recordings never expire and are never evicted in this mode.
+#   LLM_MODE=stub    deterministic canned replies, no cache or network at all
+
+MODES = ("live", "cache", "replay", "stub")
+DEFAULT_PATH = Path(__file__).resolve().parents[1] / "storage" / "cache" / "llm.sqlite"
+
+class ReplayMiss(LookupError):
+    """LLM_MODE=replay and no recorded response for this request."""
+
+
+def request_key(model: str, messages: list[dict], temperature: float,
+                response_format: dict | None = None, schema: dict | None = None) -> str:
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "response_format": response_format,
+        "schema": schema,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+class LLMCache:
+    """SQLite store with TTL and size (entry count) eviction; safe across threads and processes."""
+
+    def __init__(self, path: Path | str = DEFAULT_PATH, ttl: float | None = None, max_entries: int | None = None):
+        self.path = Path(os.getenv("LLM_CACHE_PATH") or path)
+        self.ttl = float(ttl if ttl is not None else os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))
+        self.max_entries = int(max_entries if max_entries is not None else os.getenv("LLM_CACHE_MAX", 5000))
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT, value TEXT NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            db.commit()
+            self._db = db
+        return self._db
+
+    def get(self, key: str, expire: bool = True) -> str | None:
+        """
+        The stored response, or None. With expire (cache mode), rows older than the
+        TTL are deleted and hits refresh the LRU clock; expire=False (replay) only reads.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            row = db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and expire and self.ttl > 0 and now - row[1] > self.ttl:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                db.commit()
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            if expire:
+                db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                db.commit()
+            self.stats["hits"] += 1
+            return row[0]
+
+    def put(self, key: str, model: str, value: str):
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, value, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, model, value, now, now),
+            )
+            # size bound: keep the most recently used max_entries rows
+            db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def stub_response(response_format: dict | None, schema: dict | None) -> str:
+    """Deterministic offline reply: the schema's defaults for JSON calls, empty text otherwise."""
+    if not response_format and not schema:
+        return ""
+    out: dict[str, Any] = {}
+    for name, prop in ((schema or {}).get("properties") or {}).items():
+        if "default" in prop:
+            out[name] = prop["default"]
+    return json.dumps(out)
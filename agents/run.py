@@ -1,12 +1,101 @@
 from .graph import build_graph
-import json
+from .tools.browser_pool import shutdown_pool
+from .tools.perf_runner import shutdown_perf_runner
+from .agents.qa_matrix import shutdown_matrix
+from .tools.preview import shutdown_preview
+from .checkpoint import new_run_id, run_config, sqlite_checkpointer, async_sqlite_checkpointer
+from .history import RunHistory, seed_points
+from .trace import tracer
+import argparse, asyncio, cProfile, json, sys
+
+INIT = {"brief": "Build SeeMe hero", "target_image": "assets/target/hero.png"}
+RECURSION_LIMIT = 25  # Cap the loop so it doesn’t error while iterating
+
+def _start(run_id: str, init: dict, snap=None):
+    """(stream input, history) for a new run, or for resuming from its checkpoint snapshot."""
+    if snap is None:
+        return init, RunHistory(run_id, init)
+    if not snap.values:
+        sys.exit(f"no checkpoint for run {run_id}")
+    if not snap.next:
+        print(f"run {run_id} already finished", file=sys.stderr)
+    return None, RunHistory(run_id, snap.values)  # None = continue from the checkpoint
+
+async def _astream(run_id: str, resume: bool, init: dict, config: dict):
+    from .tools.qa_async import shutdown_async_pool
+
+    try:
+        async with async_sqlite_checkpointer() as saver:
+            app = build_graph(async_qa=True, checkpointer=saver)
+            inp, history = _start(run_id, init, await app.aget_state(config) if resume else None)
+            async for delta in app.astream(inp, config=config):
+                history.observe(delta)
+                print(json.dumps(delta, indent=2))
+    finally:
+        await shutdown_async_pool()
 
 def main():
-    app = build_graph()
-    init = {"brief": "Build SeeMe hero", "target_image": "assets/target/hero.png"}
-    # Cap the loop so it doesn’t error while iterating
-    for delta in app.stream(init, config={"recursion_limit": 25}):
-        print(json.dumps(delta, indent=2))
+    ap = argparse.ArgumentParser(description="Run the SeeMe hero tuning loop.")
+    ap.add_argument("--async", dest="use_async", action="store_true",
+                    help="run QA checks concurrently in one asyncio event loop")
+    ap.add_argument("--resume", metavar="RUN_ID",
+                    help="continue a run from its last completed node (see storage/checkpoints.sqlite)")
+    ap.add_argument("--seed-from", metavar="RUN_ID",
+                    help="start the critic's numeric search from an earlier run's history")
+    ap.add_argument("--trace", metavar="PATH",
+                    help="write a Chrome trace (chrome://tracing / Perfetto) and print a timing summary")
+    ap.add_argument("--profile", metavar="PATH", help="write cProfile stats (pstats format)")
+    args = ap.parse_args()
+
+    if args.trace:
+        tracer.enabled = True
+    prof = None
+    if args.profile:
+        if args.use_async:
+            prof = cProfile.Profile()  # one event loop thread: profile it whole
+        else:
+            tracer.profiles = []  # sync nodes run on worker threads: profile per node
+
+    run_id = args.resume or new_run_id()
+    config = run_config(run_id, RECURSION_LIMIT)
+    init = dict(INIT)
+    if args.seed_from and not args.resume:
+        from .tools.io_tools import read_json
+
+        tuning = read_json("specs/ui_spec.json").get("hero", {}).get("tuning", {}) or {}
+        init["gap_history"] = seed_points(args.seed_from, tuning.get("searchKey", "headlineGap"), init["target_image"])
+    print(f"run {run_id}" + (" (resumed)" if args.resume else ""), file=sys.stderr)
+
+    try:
+        if args.use_async:
+            coro = _astream(run_id, bool(args.resume), init, config)
+            if prof:
+                prof.runcall(asyncio.run, coro)
+            else:
+                asyncio.run(coro)
+        else:
+            with sqlite_checkpointer() as saver:
+                app = build_graph(checkpointer=saver)
+                inp, history = _start(run_id, init, app.get_state(config) if args.resume else None)
+                for delta in app.stream(inp, config=config):
+                    history.observe(delta)
+                    print(json.dumps(delta, indent=2))
+    except KeyboardInterrupt:
+        print(f"\ninterrupted; continue with: python -m agents.run --resume {run_id}", file=sys.stderr)
+    finally:
+        shutdown_pool()  # the QA browsers live for the whole run
+        shutdown_perf_runner()
+        shutdown_matrix()
+        shutdown_preview()
+        if args.trace:
+            print(tracer.summary_table())
+            print(f"trace: {tracer.export_chrome(args.trace)}")
+        if args.profile:
+            if prof:
+                prof.dump_stats(args.profile)
+            else:
+                tracer.dump_profile(args.profile)
+            print(f"profile: {args.profile}")
 
 
 if __name__ == "__main__":
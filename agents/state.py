@@ -14,6 +14,14 @@ class State(TypedDict, total=False):
     qa_visual: Dict[str, Any]
     qa_a11y: Dict[str, Any]
     qa_perf: Dict[str, Any]
+    qa_timeline: Dict[str, Any]   # per-cue scores of the copy timeline (see agents/qa_timeline.py)
 
     score: float
     issues: List[str]
+
+    # numeric-search critic: [[knob px, score], ...] and its stop flag
+    gap_history: List[List[float]]
+    converged: bool
+
+    # regions (roi names) whose pixels the last spec edit can have changed; None = all
+    dirty_regions: Optional[List[str]]
@@ -1,13 +1,16 @@
 import json
 from pathlib import Path
 from .io_tools import read_json, write_json, root_path, ensure_dir
+from .spec_store import compile_pointer, set_pointer
+from .spec_resolver import update_token
 from ..schemas import TokenEdit, UISpecEdit, CodePatch
 
 def _phone_locked() -> bool:
     ui = read_json("specs/ui_spec.json")
     return bool((ui.get("hero") or {}).get("tuning", {}).get("lockPhoneWidth", False))
 
-def apply_token_edits(edits: list[TokenEdit]) -> list[str]:
+def apply_token_edits(edits: list[TokenEdit], affected: set | None = None) -> list[str]:
+    """Apply token edits; spec paths that depend on them (JSON pointers) are added to `affected`."""
     tokens = read_json("specs/tokens.json")
     msgs = []
     locked = _phone_locked()
@@ -24,6 +27,9 @@ def apply_token_edits(edits: list[TokenEdit]) -> list[str]:
             bucket[e.key] = float(e.value_float)
         elif e.value_str is not None:
             bucket[e.key] = str(e.value_str)
+        deps = update_token(f"{e.path}.{e.key}", bucket.get(e.key))
+        if affected is not None:
+            affected.update(deps)
         msgs.append(f"{e.path}.{e.key} → {bucket[e.key]}")
 
     write_json("specs/tokens.json", tokens)
@@ -32,12 +38,7 @@ def apply_token_edits(edits: list[TokenEdit]) -> list[str]:
 def apply_ui_edits(edits: list[UISpecEdit]) -> list[str]:
     ui = read_json("specs/ui_spec.json")
     for e in edits:
-        # naive JSON pointer implementation
-        parts = [p for p in e.json_pointer.split("/") if p]
-        cur = ui
-        for p in parts[:-1]:
-            cur = cur[p]
-        cur[parts[-1]] = e.value
+        set_pointer(ui, compile_pointer(e.json_pointer), e.value)
     write_json("specs/ui_spec.json", ui)
     return [f"{e.json_pointer} → {e.value!r}" for e in edits]
 
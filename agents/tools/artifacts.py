@@ -0,0 +1,31 @@
+from .io_tools import root_path, ensure_dir
+from concurrent.futures import ThreadPoolExecutor, Future
+from ..trace import count
+from PIL import Image
+import numpy as np
+import os
+
+# PNG encoding of debug images (actual.png / diff.png) happens here, on a single
+# background thread, so it never sits on the QA critical path.
+
+DEBUG = os.getenv("QA_DEBUG_ARTIFACTS", "0") == "1"  # always write, even on pass
+
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qa-artifacts")
+
+def _save(arr: np.ndarray, out):
+    tmp = out.with_suffix(".part.png")
+    Image.fromarray(arr).save(tmp)
+    count("bytes_written", tmp.stat().st_size)
+    tmp.replace(out)  # readers never see a half-written PNG
+
+def save_png_async(arr: np.ndarray, rel: str) -> tuple[str, Future]:
+    """Queue arr for PNG encoding at rel; returns (absolute path, future)."""
+    out = root_path(rel); ensure_dir(out)
+    return str(out), _writer.submit(_save, np.array(arr, copy=True), out)
+
+def dissimilarity_image(ssim_map: np.ndarray) -> np.ndarray:
+    return (np.clip(1.0 - ssim_map, 0.0, 1.0) * 255).astype(np.uint8)
+
+def flush():
+    """Block until queued artifacts are on disk (the executor also drains at exit)."""
+    _writer.submit(lambda: None).result()
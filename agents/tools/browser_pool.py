@@ -0,0 +1,299 @@
+from playwright.sync_api import sync_playwright
+from concurrent.futures import Future
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from ..trace import span, count
+import os, queue, socket, subprocess, tempfile, threading, time, atexit, urllib.request, json, shutil
+
+# One headless Chromium per graph run, exposed over a CDP port.
+# Sync Playwright work runs on a fixed set of pool-owned threads; each attaches its
+# own Playwright driver to that process (stopped by the same thread at shutdown)
+# and leases a fresh, isolated context per check, so launches drop to ~1 per run.
+
+MAX_USES = int(os.getenv("QA_BROWSER_MAX_USES", "50"))  # recycle after N leases
+THREADS = int(os.getenv("QA_BROWSER_THREADS", str(min(4, os.cpu_count() or 2))))  # one node driver each
+HEADLESS_FLAGS = [
+    "--headless=new",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-background-networking",
+    "--disable-extensions",
+    "--mute-audio",
+]
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@lru_cache(maxsize=1)
+def _chromium_executable() -> str:
+    """Path of the Chromium build Playwright installed (or CHROME_PATH override)."""
+    override = os.getenv("CHROME_PATH")
+    if override:
+        return override
+    # Resolve on a scratch thread: the caller may already own a Playwright driver
+    # or a running asyncio loop, and sync_playwright() refuses to nest in either.
+    found: list[str] = []
+    def _lookup():
+        with sync_playwright() as pw:
+            found.append(pw.chromium.executable_path)
+    t = threading.Thread(target=_lookup)
+    t.start(); t.join()
+    if not found:
+        raise RuntimeError("Could not locate Playwright's Chromium; run `playwright install chromium`.")
+    return found[0]
+
+
+class ChromeProcess:
+    """A headless Chromium listening on a remote-debugging port."""
+
+    def __init__(self, extra_args: list[str] | None = None):
+        self.extra_args = list(extra_args or [])
+        self.port: int | None = None
+        self._proc: subprocess.Popen | None = None
+        self._profile: str | None = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 15.0):
+        with span("browser.launch", "browser"):
+            self._start(timeout)
+        count("browser_launches")
+        return self
+
+    def _start(self, timeout: float):
+        self.port = _free_port()
+        self._profile = tempfile.mkdtemp(prefix="seeme-chrome-")
+        cmd = [
+            _chromium_executable(),
+            *HEADLESS_FLAGS,
+            f"--remote-debugging-port={self.port}",
+            f"--user-data-dir={self._profile}",
+            *self.extra_args,
+            "about:blank",
+        ]
+        self._proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.healthy():
+                return
+            if self._proc.poll() is not None:
+                break
+            time.sleep(0.05)
+        self.close()
+        raise RuntimeError("Chromium did not expose its debugging port in time.")
+
+    def alive(self) -> bool:
+        """Cheap liveness check (no network): the process hasn't exited."""
+        return self._proc is not None and self._proc.poll() is None
+
+    def healthy(self) -> bool:
+        if not self._proc or self._proc.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(f"{self.endpoint}/json/version", timeout=1) as r:
+                return bool(json.loads(r.read()).get("webSocketDebuggerUrl"))
+        except Exception:
+            return False
+
+    def close(self):
+        if self._proc and self._proc.poll() is None:
+            self._proc.terminate()
+            try:
+                self._proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+        self._proc = None
+        if self._profile:
+            shutil.rmtree(self._profile, ignore_errors=True)
+            self._profile = None
+
+
+class BrowserPool:
+    """
+    Long-lived Chromium shared by all QA tools for the lifetime of a run.
+    Sync Playwright objects are bound to the thread that created them, so browser
+    work is submitted to the pool's own threads (`run` / `submit`); each keeps its
+    CDP connection for the whole run and stops its driver when the pool closes.
+    """
+
+    def __init__(self, max_uses: int = MAX_USES, threads: int = THREADS):
+        self.max_uses = max_uses
+        self.threads = max(1, threads)
+        self.launches = 0
+        self._chrome: ChromeProcess | None = None
+        self._generation = 0
+        self._uses = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._tasks: queue.SimpleQueue | None = None
+        self._workers: list[threading.Thread] = []
+
+    # --- browser threads ---
+
+    def _worker(self, tasks: queue.SimpleQueue):
+        loc = self._local
+        loc.owned = True
+        try:
+            while (item := tasks.get()) is not None:
+                fut, fn, args, kwargs = item
+                if not fut.set_running_or_notify_cancel():
+                    continue
+                try:
+                    fut.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    fut.set_exception(e)
+        finally:
+            if getattr(loc, "driver", None) is not None:
+                loc.driver.stop()  # on the thread that started it
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Run fn(*args, **kwargs) on a browser thread; returns its Future."""
+        fut = Future()
+        with self._lock:
+            if self._tasks is None:
+                self._tasks = queue.SimpleQueue()
+                self._workers = [
+                    threading.Thread(target=self._worker, args=(self._tasks,), name=f"qa-browser-{i}", daemon=True)
+                    for i in range(self.threads)
+                ]
+                for t in self._workers:
+                    t.start()
+            self._tasks.put((fut, fn, args, kwargs))
+        return fut
+
+    def run(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs) on a browser thread (inline when already on one)."""
+        if getattr(self._local, "owned", False):
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    # --- process lifecycle ---
+
+    def _ensure_chrome(self):
+        """Start, recycle or replace an exited browser. Caller holds the lock (no network I/O here)."""
+        recycle = self._uses >= self.max_uses and self._active == 0
+        if self._chrome and (recycle or not self._chrome.alive()):
+            self._chrome.close()
+            self._chrome = None
+        if self._chrome is None:
+            self._chrome = ChromeProcess().start()
+            self._generation += 1
+            self._uses = 0
+            self.launches += 1
+        return self._chrome.endpoint, self._generation
+
+    def _browser(self, endpoint: str, generation: int):
+        """This thread's connection to the shared browser (reconnect after a recycle)."""
+        loc = self._local
+        if not getattr(loc, "owned", False):
+            raise RuntimeError("sync browser work must run on a pool thread (BrowserPool.run / on_browser_thread)")
+        if getattr(loc, "generation", None) != generation or not loc.browser.is_connected():
+            if getattr(loc, "driver", None) is None:
+                loc.driver = sync_playwright().start()
+            loc.browser = loc.driver.chromium.connect_over_cdp(endpoint)
+            loc.generation = generation
+        return loc.browser
+
+    def acquire(self) -> tuple[str, int]:
+        """Reserve a lease on the shared browser; returns (cdp endpoint, generation)."""
+        with self._lock:
+            endpoint, generation = self._ensure_chrome()
+            self._uses += 1
+            self._active += 1
+        return endpoint, generation
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+
+    def report_failure(self, generation: int):
+        """
+        Connecting to `generation` failed: probe it over HTTP (outside the lock) and,
+        if it is unresponsive, drop it so the next acquire() launches a new one.
+        """
+        with self._lock:
+            chrome = self._chrome if generation == self._generation else None
+        if chrome is None or chrome.healthy():
+            return
+        with self._lock:
+            if self._chrome is not chrome:
+                return
+            self._chrome = None
+        chrome.close()
+
+    def _lease_browser(self):
+        """acquire() plus this thread's connection, retried once on a fresh browser."""
+        for attempt in range(2):
+            endpoint, generation = self.acquire()
+            try:
+                return self._browser(endpoint, generation)
+            except Exception:
+                self.release()
+                self.report_failure(generation)
+                if attempt:
+                    raise
+
+    @contextmanager
+    def context(self, width=1280, height=720):
+        """Lease a fresh isolated context (configured like `_new_context`)."""
+        from .qa_tools import _new_context
+
+        browser = self._lease_browser()
+        try:
+            ctx = _new_context(browser, width=width, height=height)
+            try:
+                yield ctx
+            finally:
+                ctx.close()
+        finally:
+            self.release()
+
+    def close(self):
+        """Stop every browser thread (each stops its own driver), then the browser."""
+        with self._lock:
+            tasks, workers = self._tasks, self._workers
+            self._tasks, self._workers = None, []
+        if tasks is not None:
+            for _ in workers:
+                tasks.put(None)  # queued after any pending work
+            for t in workers:
+                if t is not threading.current_thread():
+                    t.join()
+        with self._lock:
+            chrome, self._chrome = self._chrome, None
+        if chrome:
+            chrome.close()
+
+
+# --- Module-level pool -----------------------------------------------------
+
+_pool: BrowserPool | None = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> BrowserPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+        return _pool
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool:
+        pool.close()
+
+atexit.register(shutdown_pool)
+
+def on_browser_thread(fn):
+    """Decorator: run a sync Playwright tool on one of the shared pool's threads."""
+    @wraps(fn)
+    def run(*args, **kwargs):
+        return get_pool().run(fn, *args, **kwargs)
+    return run
@@ -0,0 +1,51 @@
+from .qa_tools import _goto, _grab_frame, visual_report, REJECT_BELOW
+from .browser_pool import get_pool
+from .roi import element_boxes, score_regions
+from ..trace import traced
+from .preview import with_query, URL_KNOBS
+
+# Score several spacing candidates against the cached target in one wide step.
+# Each candidate is injected through the page URL (?spacing.headlineGap=…, read by
+# HeroWithTimeline) and rendered in its own browser context, so specs/tokens.json
+# is only written once, for the winner. Renders share the browser pool's threads
+# (QA_BROWSER_THREADS), so no drivers are started per search round.
+
+def candidate_url(base_url: str, spacing: dict) -> str:
+    bad = set(spacing) - set(URL_KNOBS)
+    if bad:
+        raise ValueError(f"spacing keys not injectable via URL: {sorted(bad)}")
+    # replaces the preview URL's own spacing.<key> values for these knobs
+    return with_query(base_url, {f"spacing.{k}": v for k, v in spacing.items()})
+
+def _render_and_score(url: str, size, target_rel: str, regions: dict) -> dict:
+    w, h = size
+    with get_pool().context(width=w, height=h) as ctx:
+        page = ctx.new_page()
+        _goto(page, url)
+        frame = _grab_frame(page)
+        boxes = element_boxes(page, regions)
+    # a candidate already below QA_SSIM_REJECT_BELOW at the coarse level loses anyway
+    rep, ssim_map = visual_report(frame, target_rel, size=size, reject_below=REJECT_BELOW)
+    if boxes and not rep.get("rejected"):
+        rep["regions"] = score_regions(frame, target_rel, size, boxes, ssim_map)
+    return rep
+
+@traced()
+def evaluate_candidates(base_url: str, candidates: list[dict], size, target_rel: str,
+                        regions: dict | None = None) -> list[dict]:
+    """
+    Render and score every spacing set in parallel (regions: name → selector, optional).
+    Returns [{"spacing", "similarity", "worstTile", "regions"}, ...] in input order
+    (plus "rejected": True for candidates cut off by QA_SSIM_REJECT_BELOW).
+    """
+    if not candidates:
+        return []
+    pool = get_pool()
+    futures = [pool.submit(_render_and_score, candidate_url(base_url, c), size, target_rel, regions or {})
+               for c in candidates]
+    reports = [f.result() for f in futures]
+    return [
+        {"spacing": c, "similarity": float(r["similarity"]), "worstTile": r["worstTile"],
+         "regions": r.get("regions", {}), **({"rejected": True} if r.get("rejected") else {})}
+        for c, r in zip(candidates, reports)
+    ]
@@ -0,0 +1,103 @@
+GOLDEN = 0.381966  # 2 - φ
+
+# Deterministic 1-D search over an integer knob (e.g. spacing.headlineGap):
+# expand until the best point is bracketed, then parabolic interpolation with a
+# golden-section fallback. Stateless: everything is derived from (value, score) history.
+
+def _parabola_vertex(a, fa, b, fb, c, fc) -> float | None:
+    den = (b - a) * (fb - fc) - (b - c) * (fb - fa)
+    if den == 0:
+        return None
+    num = (b - a) ** 2 * (fb - fc) - (b - c) ** 2 * (fb - fa)
+    return b - 0.5 * num / den
+
+def next_value(history, lo: int, hi: int, step: int = 4, deadband: float = 0.0):
+    """
+    history: [(value, score), ...] in evaluation order (higher score is better).
+    Returns (next value to try, note) or (None, reason) once converged/stalled.
+    """
+    if not history:
+        return None, "no history"
+    pts: dict[int, float] = {}
+    for v, s in history:
+        pts[int(v)] = float(s)  # re-evaluations overwrite
+    best = max(pts, key=pts.get)
+    best_s = pts[best]
+
+    if deadband > 0 and len(history) >= 4:
+        before = max(float(s) for _, s in history[:-3])
+        if best_s - before < deadband:
+            return None, f"stalled: last 3 evaluations improved by < {deadband}"
+
+    left = max((v for v in pts if v < best), default=None)
+    right = min((v for v in pts if v > best), default=None)
+    left_closed = left is not None or best <= lo
+    right_closed = right is not None or best >= hi
+
+    # 1) bracketing: step outward (doubling) until both sides are worse
+    if not right_closed and not left_closed:
+        return min(hi, best + step), "probe"
+    if not right_closed:
+        span = best - left if left is not None else step
+        return min(hi, best + max(step, 2 * span)), "expand up"
+    if not left_closed:
+        span = right - best if right is not None else step
+        return max(lo, best - max(step, 2 * span)), "expand down"
+
+    a = left if left is not None else best
+    c = right if right is not None else best
+    if c - a <= 2:
+        return None, f"converged at {best}"
+
+    # 2) parabolic step through (left, best, right)
+    if left is not None and right is not None:
+        x = _parabola_vertex(a, pts[a], best, best_s, c, pts[c])
+        if x is not None:
+            x = int(round(x))
+            if a < x < c and x != best and x not in pts:
+                return x, "parabolic"
+
+    # 3) golden-section probe into the wider side
+    if c - best >= best - a:
+        x = best + max(1, int(round(GOLDEN * (c - best))))
+    else:
+        x = best - max(1, int(round(GOLDEN * (best - a))))
+    if x in pts or not (a < x < c):
+        # neighbours of the best point are the last untested candidates
+        for x in (best + 1, best - 1):
+            if a < x < c and x not in pts:
+                return x, "refine"
+        return None, f"converged at {best}"
+    return x, "golden"
+
+def next_values(history, n: int, lo: int, hi: int, step: int = 4, deadband: float = 0.0):
+    """
+    Batch variant of `next_value`: up to n untested values to render in parallel.
+    Before a bracket exists they fan out around the best point (±step, ±2·step, …);
+    afterwards they are spread evenly inside the bracket.
+    Returns (values, note); an empty list means converged/stalled.
+    """
+    first, why = next_value(history, lo, hi, step, deadband)
+    if first is None:
+        return [], why
+    pts = {int(v): float(s) for v, s in history}
+    best = max(pts, key=pts.get)
+    left = max((v for v in pts if v < best), default=None)
+    right = min((v for v in pts if v > best), default=None)
+
+    out = [first]
+    if left is not None and right is not None:
+        k = n + 1
+        pool = [int(round(left + (right - left) * i / k)) for i in range(1, k)]
+    else:
+        pool = []
+        mult = 1
+        while len(pool) < 4 * n and mult * step <= hi - lo:
+            pool += [best + mult * step, best - mult * step]
+            mult *= 2
+    for v in pool:
+        if len(out) >= n:
+            break
+        if lo <= v <= hi and v not in pts and v not in out:
+            out.append(v)
+    return out, f"batch ({why})"
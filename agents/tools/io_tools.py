@@ -1,22 +1,41 @@
 from pathlib import Path
-import json
+from functools import lru_cache
+import os
 
 def write_json(rel_path: str, data):
-    p = root_path(rel_path)
-    ensure_dir(p)
-    p.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    """Atomic write-through the spec store (staged while a store.batch() is open)."""
+    from .spec_store import store
+    store.write(rel_path, data)
 
 ROOT = Path(__file__).resolve().parents[2]  # repo root (../.. from here)
 
+# A batch worker (see agents/batch.py) sets SEEME_WORKSPACE to its own directory;
+# the paths a run edits or writes per run then resolve there instead of the repo.
+# Everything else (site sources, targets, shared caches) stays in the repo.
+WORKSPACE_ENV = "SEEME_WORKSPACE"
+WORKSPACE_DIRS = ("specs", "agents/.tmp")
+
+@lru_cache(maxsize=4)
+def _resolved(ws: str) -> Path:
+    return Path(ws).resolve()
+
+def workspace() -> Path | None:
+    ws = os.getenv(WORKSPACE_ENV)
+    return _resolved(ws) if ws else None
+
 def root_path(*parts) -> Path:
-    return ROOT.joinpath(*parts)
+    p = ROOT.joinpath(*parts)
+    ws = workspace()
+    if ws is not None and not Path(*parts).is_absolute():
+        rel = p.relative_to(ROOT).as_posix()
+        if any(rel == d or rel.startswith(d + "/") for d in WORKSPACE_DIRS):
+            return ws / rel
+    return p
 
 def read_json(rel_path: str):
-    p = root_path(rel_path)
-    raw = p.read_text("utf-8")
-    if raw and ord(raw[0]) == 0xFEFF:  # strip BOM if present
-        raw = raw[1:]
-    return json.loads(raw)
+    """Parsed JSON from the validated spec-store cache (BOM tolerated); safe to mutate."""
+    from .spec_store import store
+    return store.read(rel_path)
 
 def ensure_dir(path: Path):
     path.parent.mkdir(parents=True, exist_ok=True)
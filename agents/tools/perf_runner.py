@@ -0,0 +1,159 @@
+from .io_tools import root_path
+from .browser_pool import ChromeProcess
+from ..trace import span
+from statistics import median
+import asyncio, json, os, shutil, subprocess, threading, atexit
+
+# Warm Lighthouse: the CLI is installed once into agents/.cache and attaches
+# (--port) to a Chrome we keep running, instead of `pnpm dlx` + a cold Chrome per call.
+
+LIGHTHOUSE_VERSION = "12.6.0"
+LIGHTHOUSE_RUNS = int(os.getenv("LIGHTHOUSE_RUNS", "1"))  # >1 → median of N runs
+CACHE_REL = f"agents/.cache/lighthouse-{LIGHTHOUSE_VERSION}"
+
+LIGHTHOUSE_FLAGS = [
+    "--quiet",
+    "--only-categories=performance",
+    "--output=json",
+    "--output-path=stdout",
+]
+
+class RunnerUnavailable(RuntimeError):
+    """The warm runner can't start (no CLI install or no Chrome); callers may fall back to a cold run."""
+
+class PerfRunner:
+    def __init__(self, runs: int = LIGHTHOUSE_RUNS):
+        self.runs = max(1, runs)
+        self._chrome: ChromeProcess | None = None
+        self._cli: str | None = None
+        self._install_error: str | None = None  # a failed install isn't retried in this process
+        self._lock = threading.Lock()  # one audit at a time per Chrome
+        self._alock: asyncio.Lock | None = None
+
+    def _install(self) -> str:
+        """Install the pinned Lighthouse CLI into the cache dir (once) and return its entry point."""
+        prefix = root_path(CACHE_REL)
+        cli = prefix / "node_modules" / "lighthouse" / "cli" / "index.js"
+        if cli.exists():
+            return str(cli)
+        prefix.mkdir(parents=True, exist_ok=True)
+        if shutil.which("npm"):
+            cmd = ["npm", "install", "--prefix", str(prefix), "--no-audit", "--no-fund",
+                   f"lighthouse@{LIGHTHOUSE_VERSION}"]
+        elif shutil.which("pnpm"):
+            cmd = ["pnpm", "add", f"lighthouse@{LIGHTHOUSE_VERSION}",
+                   "--dir", str(prefix), "--ignore-workspace"]
+        else:
+            raise RuntimeError("no runner found (pnpm/npm)")
+        subprocess.run(cmd, capture_output=True, text=True, check=True)
+        if not cli.exists():
+            raise RuntimeError(f"lighthouse install did not produce {cli}")
+        return str(cli)
+
+    def _ensure_chrome(self) -> int:
+        if self._chrome is None or not self._chrome.healthy():
+            if self._chrome:
+                self._chrome.close()
+            self._chrome = ChromeProcess().start()
+        return self._chrome.port
+
+    def _prepare(self) -> int:
+        """Install the CLI if needed and return the Chrome debugging port (RunnerUnavailable if either fails)."""
+        if self._cli is None:
+            if self._install_error:
+                raise RunnerUnavailable(self._install_error)
+            try:
+                with span("lighthouse.install"):
+                    self._cli = self._install()
+            except Exception as e:
+                self._install_error = f"lighthouse install failed: {e}"
+                raise RunnerUnavailable(self._install_error) from e
+        try:
+            return self._ensure_chrome()
+        except Exception as e:
+            raise RunnerUnavailable(f"chrome failed to start: {e}") from e
+
+    def _command(self, url: str, port: int) -> list[str]:
+        return ["node", self._cli, url, f"--port={port}", *LIGHTHOUSE_FLAGS]
+
+    @staticmethod
+    def _score(stdout: str) -> int:
+        data = json.loads(stdout)
+        return int(round((data["categories"]["performance"]["score"] or 0) * 100))
+
+    @staticmethod
+    def _result(scores: list[int]) -> dict:
+        res = {"performance": int(round(median(scores)))}
+        if len(scores) > 1:
+            res["runs"] = scores
+        return res
+
+    def run(self, url: str) -> dict:
+        """Returns {"performance": 0..100} (median over runs) or adds "error" ("unavailable" if it couldn't start)."""
+        with self._lock:
+            try:
+                port = self._prepare()
+                scores = []
+                for _ in range(self.runs):
+                    with span("lighthouse.audit"):
+                        out = subprocess.run(self._command(url, port), capture_output=True, text=True, check=True)
+                    scores.append(self._score(out.stdout))
+            except RunnerUnavailable as e:
+                return {"performance": 0, "error": str(e), "unavailable": True}
+            except Exception as e:
+                return {"performance": 0, "error": str(e)}
+        return self._result(scores)
+
+    async def arun(self, url: str) -> dict:
+        """Async `run`: Lighthouse runs via asyncio subprocesses, off the event loop."""
+        if self._alock is None:
+            self._alock = asyncio.Lock()
+        async with self._alock:
+            try:
+                port = await asyncio.to_thread(self._locked_prepare)
+                scores = []
+                for _ in range(self.runs):
+                    with span("lighthouse.audit"):
+                        proc = await asyncio.create_subprocess_exec(
+                            *self._command(url, port),
+                            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                        )
+                        stdout, stderr = await proc.communicate()
+                    if proc.returncode:
+                        raise RuntimeError(f"lighthouse exited {proc.returncode}: {stderr.decode()[-500:]}")
+                    scores.append(self._score(stdout.decode()))
+            except RunnerUnavailable as e:
+                return {"performance": 0, "error": str(e), "unavailable": True}
+            except Exception as e:
+                return {"performance": 0, "error": str(e)}
+        return self._result(scores)
+
+    def _locked_prepare(self) -> int:
+        with self._lock:
+            return self._prepare()
+
+    def close(self):
+        with self._lock:
+            if self._chrome:
+                self._chrome.close()
+                self._chrome = None
+
+
+_runner: PerfRunner | None = None
+_runner_lock = threading.Lock()
+
+def get_perf_runner() -> PerfRunner:
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = PerfRunner()
+        return _runner
+
+def shutdown_perf_runner():
+    global _runner
+    with _runner_lock:
+        runner, _runner = _runner, None
+    if runner:
+        runner.close()
+
+atexit.register(shutdown_perf_runner)
@@ -0,0 +1,249 @@
+from .io_tools import root_path
+from .target_cache import file_hash
+from ..trace import span
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode, urlsplit, urlunsplit, parse_qsl
+from contextlib import contextmanager
+import atexit, hashlib, json, os, shutil, subprocess, threading, time
+
+# Opt-in preview manager for the dev node (PREVIEW_MODE=static; the default is an
+# external `next dev` server): a static export of site/ (next build with
+# output: "export"), rebuilt only when the content hash of its inputs changes, and
+# served from an in-process HTTP server. Spacing knobs the page can take from the
+# URL (?spacing.<key>=, see HeroWithTimeline) are left out of the hash and injected
+# into the preview URL instead, so a critic step that only moves a gap costs no build.
+#   PREVIEW_MODE=static   use the manager (default "dev": PREVIEW_URL or localhost:3000)
+#   PREVIEW_URL=...       external server to use in either mode (e.g. the benchmark fixture)
+#   PREVIEW_PORT=...      fixed port for the server (default: any free port)
+#   PREVIEW_KEEP_BUILDS=3 finished builds kept on disk, besides those in use (min 1)
+# Builds live in one shared dir (batch workers reuse each other's). A manager
+# holds a lease file on the build it serves, refreshed on every ensure(), and
+# _prune never deletes a leased build.
+
+SITE_REL = "site"
+BUILDS_REL = "storage/cache/preview"
+PREVIEW_MODE = os.getenv("PREVIEW_MODE", "dev")
+KEEP_BUILDS = max(1, int(os.getenv("PREVIEW_KEEP_BUILDS", "3")))  # counts the build just made
+BUILD_LOCK_REL = f"{BUILDS_REL}/.build.lock"  # next build writes site/out: one build at a time
+LEASE_LOCK_REL = f"{BUILDS_REL}/.lease.lock"  # taking a lease vs pruning
+LEASES_REL = f"{BUILDS_REL}/.leases"          # <build>.<owner> files, one per serving manager
+LEASE_TTL_S = 3600                            # unrefreshed longer than this: owner died
+URL_KNOBS = ("heroTopGap", "headlineGap", "phoneTopGap", "phoneToBadgeGap")  # ?spacing.<key>=
+SITE_FILES = ("next.config.ts", "package.json", "tsconfig.json", "postcss.config.js", "tailwind.config.js")
+SPEC_FILES = ("specs/ui_spec.json", "specs/copy.json", "specs/copy_timeline.json")
+READY_ATTR = "data-qa-ready"  # set on <html> once the page has settled (fonts, media, overrides)
+
+def with_query(url: str, params: dict) -> str:
+    """url with `params` set in its query string (existing keys of the same name replaced)."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k not in params]
+    query += [(k, str(v)) for k, v in params.items()]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def _tokens_without_url_knobs() -> bytes:
+    from .io_tools import read_json
+
+    tokens = read_json("specs/tokens.json")
+    spacing = {k: v for k, v in (tokens.get("spacing") or {}).items() if k not in URL_KNOBS}
+    return json.dumps({**tokens, "spacing": spacing}, sort_keys=True).encode()
+
+def input_hash() -> str:
+    """Hash of everything baked into the export (sources, public assets, configs, specs)."""
+    site = root_path(SITE_REL)
+    h = hashlib.sha256()
+    files = [*(site / "src").rglob("*"), *(site / "public").rglob("*"), *(site / f for f in SITE_FILES)]
+    for p in sorted(f for f in files if f.is_file()):
+        h.update(str(p.relative_to(site)).encode())
+        h.update(file_hash(p).encode())
+    for rel in SPEC_FILES:
+        p = root_path(rel)
+        h.update(rel.encode())
+        h.update(file_hash(p).encode() if p.exists() else b"-")
+    h.update(_tokens_without_url_knobs())
+    return h.hexdigest()
+
+def url_overrides() -> dict:
+    """Current spacing values for the URL-injectable knobs."""
+    from .io_tools import read_json
+
+    spacing = read_json("specs/tokens.json").get("spacing") or {}
+    return {f"spacing.{k}": spacing[k] for k in URL_KNOBS if k in spacing}
+
+
+@contextmanager
+def _file_lock(rel: str, timeout_s: float = 900):
+    """Cross-process lock (O_EXCL lock file; stale after `timeout_s`)."""
+    p = root_path(rel)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        try:
+            fd = os.open(p, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - p.stat().st_mtime > timeout_s:
+                    p.unlink()  # holder died while holding it
+            except FileNotFoundError:
+                pass
+            time.sleep(0.2)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        p.unlink(missing_ok=True)
+
+def _leased_builds() -> set[str]:
+    """Build dir names with a live lease (stale leases are removed)."""
+    d = root_path(LEASES_REL)
+    names = set()
+    for f in d.iterdir() if d.is_dir() else ():
+        try:
+            if time.time() - f.stat().st_mtime > LEASE_TTL_S:
+                f.unlink()
+                continue
+        except FileNotFoundError:
+            continue
+        names.add(f.name.split(".", 1)[0])
+    return names
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    def end_headers(self):
+        self.send_header("Cache-Control", "no-store")
+        super().end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class PreviewManager:
+    def __init__(self, port: int | None = None):
+        self.port = int(port if port is not None else os.getenv("PREVIEW_PORT", "0"))
+        self.build_hash: str | None = None
+        self.builds = 0
+        self._server: ThreadingHTTPServer | None = None
+        self._lock = threading.Lock()
+        self._owner = f"{os.getpid()}-{id(self):x}"
+
+    # --- build ---
+
+    def _build_cmd(self) -> list[str]:
+        if shutil.which("pnpm"):
+            return ["pnpm", "run", "build"]
+        if shutil.which("npm"):
+            return ["npm", "run", "build"]
+        raise RuntimeError("preview build needs pnpm or npm on PATH")
+
+    def _build(self, digest: str):
+        """next build (static export to site/out), moved into the per-hash build dir."""
+        site = root_path(SITE_REL)
+        dest = root_path(BUILDS_REL, digest[:16])
+        out = site / "out"
+        with _file_lock(BUILD_LOCK_REL):
+            if dest.is_dir():
+                return  # another process built the same inputs while we waited
+            shutil.rmtree(out, ignore_errors=True)
+            env = {**os.environ, "NEXT_TELEMETRY_DISABLED": "1"}  # SEEME_WORKSPACE passes through
+            with span("preview.build", "build"):
+                proc = subprocess.run(self._build_cmd(), cwd=site, env=env, capture_output=True, text=True)
+            if proc.returncode:
+                raise RuntimeError(f"preview build failed ({proc.returncode}): {(proc.stderr or proc.stdout)[-2000:]}")
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dest.with_name(dest.name + ".part")
+            shutil.rmtree(tmp, ignore_errors=True)
+            shutil.move(str(out), tmp)
+            os.replace(tmp, dest)  # the server only ever sees complete builds
+            self.builds += 1
+            self._prune(keep=dest)
+
+    def _prune(self, keep):
+        """Drop all but the KEEP_BUILDS newest builds; leased ones (served somewhere) stay."""
+        with _file_lock(LEASE_LOCK_REL):
+            leased = _leased_builds()
+            dirs = sorted((d for d in root_path(BUILDS_REL).iterdir()
+                           if d.is_dir() and not d.name.startswith(".") and d != keep and d.name not in leased),
+                          key=lambda d: d.stat().st_mtime, reverse=True)
+            for d in dirs[KEEP_BUILDS - 1:]:
+                shutil.rmtree(d, ignore_errors=True)
+
+    # --- leases ---
+
+    def _lease_path(self, digest: str):
+        return root_path(LEASES_REL, f"{digest[:16]}.{self._owner}")
+
+    def _lease(self, digest: str):
+        """Pin `digest`'s build (taken under the lease lock, so no prune is mid-way)."""
+        with _file_lock(LEASE_LOCK_REL):
+            p = self._lease_path(digest)
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.touch()
+
+    def _unlease(self, digest: str | None):
+        if digest:
+            self._lease_path(digest).unlink(missing_ok=True)
+
+    # --- serve ---
+
+    def _serve(self):
+        mgr = self
+
+        class Handler(_Handler):
+            def __init__(self, *a, **kw):
+                # resolved per request, so a new build is live as soon as it is swapped in
+                super().__init__(*a, directory=str(root_path(BUILDS_REL, mgr.build_hash[:16])), **kw)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="preview-http", daemon=True).start()
+
+    def ensure(self) -> str:
+        """Rebuild if the inputs changed, make sure the server is up; returns the preview URL."""
+        with self._lock:
+            digest = input_hash()
+            if digest != self.build_hash:
+                self._lease(digest)  # before the existence check: a leased build is never pruned
+                if not root_path(BUILDS_REL, digest[:16]).is_dir():
+                    try:
+                        self._build(digest)
+                    except BaseException:
+                        self._unlease(digest)
+                        raise
+                os.utime(root_path(BUILDS_REL, digest[:16]))  # newest for _prune
+                self._unlease(self.build_hash)
+                self.build_hash = digest
+            else:
+                self._lease_path(digest).touch()  # refresh
+            if self._server is None:
+                self._serve()
+            base = f"http://127.0.0.1:{self.port}/"
+        return with_query(base, url_overrides())
+
+    def close(self):
+        with self._lock:
+            if self._server:
+                self._server.shutdown()
+                self._server.server_close()
+                self._server = None
+            self._unlease(self.build_hash)
+            self.build_hash = None
+
+
+_manager: PreviewManager | None = None
+_manager_lock = threading.Lock()
+
+def get_preview() -> PreviewManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = PreviewManager()
+        return _manager
+
+def shutdown_preview():
+    global _manager
+    with _manager_lock:
+        mgr, _manager = _manager, None
+    if mgr:
+        mgr.close()
+
+atexit.register(shutdown_preview)
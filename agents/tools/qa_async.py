@@ -0,0 +1,157 @@
+from playwright.async_api import async_playwright
+from contextlib import asynccontextmanager
+from PIL import Image
+from io import BytesIO
+from .browser_pool import get_pool
+from .perf_runner import get_perf_runner
+from .roi import BOXES_JS
+from ..trace import traced
+from .qa_tools import (_new_context, _axe_source, _normalize_axe, _run_lighthouse_cold,
+                       READY_SELECTOR, READY_TIMEOUT_MS, HAS_MARKER_JS, SEEK_JS, TEXT_JS, SETTLE_JS)
+import numpy as np
+import asyncio, base64, os
+
+# Async counterparts of qa_tools: Playwright's async API and asyncio subprocesses,
+# so the QA branches overlap inside one event loop instead of each blocking a thread.
+
+QA_CONCURRENCY = int(os.getenv("QA_CONCURRENCY", "4"))  # simultaneous browser/Lighthouse jobs
+
+class AsyncBrowserPool:
+    """Async Playwright driver attached to the shared pooled Chromium (one per event loop)."""
+
+    def __init__(self):
+        self.limit = asyncio.Semaphore(QA_CONCURRENCY)
+        self._driver = None
+        self._browser = None
+        self._generation = None
+
+    async def _connect(self, endpoint: str, generation: int):
+        if self._generation != generation or not self._browser.is_connected():
+            if self._driver is None:
+                self._driver = await async_playwright().start()
+            self._browser = await self._driver.chromium.connect_over_cdp(endpoint)
+            self._generation = generation
+        return self._browser
+
+    async def _lease_browser(self):
+        """pool.acquire() plus our connection, retried once on a fresh browser (see BrowserPool)."""
+        pool = get_pool()
+        for attempt in range(2):
+            endpoint, generation = await asyncio.to_thread(pool.acquire)
+            try:
+                return await self._connect(endpoint, generation)
+            except Exception:
+                pool.release()
+                await asyncio.to_thread(pool.report_failure, generation)
+                if attempt:
+                    raise
+
+    @asynccontextmanager
+    async def context(self, width=1280, height=720):
+        """Lease a fresh isolated context; at most QA_CONCURRENCY at once."""
+        async with self.limit:
+            browser = await self._lease_browser()
+            try:
+                ctx = await _new_context(browser, width=width, height=height)
+                try:
+                    yield ctx
+                finally:
+                    await ctx.close()
+            finally:
+                get_pool().release()
+
+    async def close(self):
+        if self._driver is not None:
+            await self._driver.stop()
+        self._driver = self._browser = self._generation = None
+
+
+_pools: dict[asyncio.AbstractEventLoop, AsyncBrowserPool] = {}
+
+def get_async_pool() -> AsyncBrowserPool:
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = AsyncBrowserPool()
+    return pool
+
+async def shutdown_async_pool():
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool:
+        await pool.close()
+
+# --- Helpers ---------------------------------------------------------------
+
+@traced("page.goto")
+async def _goto(page, url: str):
+    await page.goto(url, wait_until="load")
+    if await page.evaluate(HAS_MARKER_JS):
+        await page.wait_for_selector(READY_SELECTOR, state="attached", timeout=READY_TIMEOUT_MS)
+    else:
+        await page.wait_for_load_state("networkidle")
+
+@traced("page.capture")
+async def _grab_frame(page) -> np.ndarray:
+    try:
+        cdp = await page.context.new_cdp_session(page)
+        try:
+            data = await cdp.send("Page.captureScreenshot", {"format": "png", "optimizeForSpeed": True})
+        finally:
+            await cdp.detach()
+        buf = base64.b64decode(data["data"])
+    except Exception:
+        buf = await page.screenshot(full_page=False, type="png")
+    return await asyncio.to_thread(lambda: np.asarray(Image.open(BytesIO(buf)).convert("RGB")))
+
+@traced("axe.run")
+async def _axe_violations(page) -> list[dict]:
+    await page.add_script_tag(content=await asyncio.to_thread(_axe_source))
+    return _normalize_axe(await page.evaluate("async () => await axe.run()"))
+
+# --- Tools -----------------------------------------------------------------
+
+@traced()
+async def acapture(url: str, width=1280, height=720, regions: dict | None = None):
+    """Async `qa_tools.capture`: (frame HxWx3 uint8, violations, boxes) from one page load."""
+    async with get_async_pool().context(width=width, height=height) as ctx:
+        page = await ctx.new_page()
+        await _goto(page, url)
+        frame = await _grab_frame(page)
+        boxes = await page.evaluate(BOXES_JS, regions) if regions else {}
+        violations = await _axe_violations(page)
+    return frame, violations, boxes
+
+@traced()
+async def arun_axe(url: str, width=1280, height=720):
+    async with get_async_pool().context(width=width, height=height) as ctx:
+        page = await ctx.new_page()
+        await _goto(page, url)
+        return await _axe_violations(page)
+
+@traced()
+async def acapture_cues(url: str, cues: list[dict], width=1280, height=720) -> list[np.ndarray]:
+    """Async `qa_tools.capture_cues`: one page load, one frame per cue midpoint."""
+    frames = []
+    async with get_async_pool().context(width=width, height=height) as ctx:
+        page = await ctx.new_page()
+        await page.clock.install()
+        await _goto(page, url)
+        at = 0.0
+        for cue in cues:
+            if not await page.evaluate(SEEK_JS, cue["mid"]):
+                await page.clock.run_for(max(0, int((cue["mid"] - at) * 1000)))
+                at = cue["mid"]
+            if cue.get("subheading"):
+                await page.wait_for_function(TEXT_JS, arg=cue["subheading"], timeout=READY_TIMEOUT_MS)
+            await page.evaluate(SETTLE_JS)
+            frames.append(await _grab_frame(page))
+    return frames
+
+@traced()
+async def arun_lighthouse(url: str):
+    """Async `qa_tools.run_lighthouse` (same {"performance", "error"} contract)."""
+    async with get_async_pool().limit:
+        res = await get_perf_runner().arun(url)
+    if not res.pop("unavailable", False):
+        return res
+    return await asyncio.to_thread(_run_lighthouse_cold, url)
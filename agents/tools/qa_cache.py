@@ -0,0 +1,129 @@
+from .io_tools import root_path
+from .target_cache import file_hash
+from .preview import input_hash as preview_input_hash
+from ..trace import count
+from functools import wraps
+from urllib.parse import urlsplit
+import hashlib, inspect, json, os, tempfile, threading
+
+# Content-addressed QA results: the key hashes everything that affects the render
+# (specs, the site sources, viewport, target image), so a no-op critic step replays the
+# previous QA results instead of touching the browser or Lighthouse.
+
+CACHE_REL = "storage/cache/qa"
+ENABLED = os.getenv("QA_CACHE", "1") != "0"
+MAX_BYTES = int(os.getenv("QA_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+SPEC_FILES = ("specs/tokens.json", "specs/ui_spec.json", "specs/copy.json", "specs/copy_timeline.json")
+
+stats = {"hits": 0, "misses": 0, "evictions": 0}
+_lock = threading.Lock()
+
+def input_key(state, kind: str) -> str:
+    """Hash of the rendered inputs for one QA check kind."""
+    h = hashlib.sha256(kind.encode())
+    files = [*SPEC_FILES, *(state.get("code_paths") or [])]
+    for rel in files:
+        p = root_path(rel)
+        h.update(rel.encode())
+        h.update(file_hash(p).encode() if p.exists() else b"-")
+    # the whole site/src + site/public tree and configs, not just the files a patch touched
+    h.update(preview_input_hash().encode())
+    ui = state.get("ui_spec", {}) or {}
+    acceptance = ui.get("hero", {}).get("acceptance", {}) or {}
+    viewports = [acceptance.get("visual", {}).get("viewport"), acceptance.get("viewports")]
+    h.update(json.dumps(viewports).encode())
+    h.update(json.dumps(acceptance.get("timeline"), sort_keys=True).encode())
+    extra = [vp.get("target") for vp in acceptance.get("viewports") or [] if isinstance(vp, dict)]
+    extra += list((acceptance.get("timeline") or {}).get("targets") or [])
+    for rel in filter(None, extra):
+        t = root_path(rel)
+        h.update(file_hash(t).encode() if t.exists() else b"-")
+    target = root_path(state.get("target_image", "assets/target/hero.png"))
+    h.update(file_hash(target).encode() if target.exists() else b"-")
+    # host:port of the managed preview changes between runs; path + query identify the render
+    url = urlsplit(state.get("preview_url") or "")
+    h.update(f"{url.path}?{url.query}".encode())
+    return h.hexdigest()
+
+def _path(key: str):
+    return root_path(CACHE_REL, f"{key}.json")
+
+def get(key: str):
+    p = _path(key)
+    try:
+        data = json.loads(p.read_text("utf-8"))
+        os.utime(p)  # mtime doubles as LRU recency
+    except (OSError, ValueError):
+        with _lock:
+            stats["misses"] += 1
+        count("qa_cache.miss")
+        return None
+    with _lock:
+        stats["hits"] += 1
+    count("qa_cache.hit")
+    return data
+
+def put(key: str, value):
+    d = root_path(CACHE_REL); d.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=d, suffix=".part")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(value, f)
+        count("bytes_written", f.tell())
+    os.replace(tmp, _path(key))
+    _evict()
+
+def _evict():
+    """Drop least-recently-used entries until the store fits MAX_BYTES."""
+    entries = []
+    for p in root_path(CACHE_REL).glob("*.json"):
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, p))
+    total = sum(e[1] for e in entries)
+    for _, size, p in sorted(entries, key=lambda e: e[0]):
+        if total <= MAX_BYTES:
+            break
+        try:
+            p.unlink()
+        except OSError:
+            continue
+        total -= size
+        with _lock:
+            stats["evictions"] += 1
+
+def _cacheable(result) -> bool:
+    """Transient failures (e.g. Lighthouse errors) are never cached."""
+    return not any(isinstance(v, dict) and v.get("error") for v in result.values())
+
+def cached(kind: str, node):
+    """Wrap a graph node (sync or async) so identical inputs replay the stored result."""
+    if inspect.iscoroutinefunction(node):
+        @wraps(node)
+        async def run_async(state):
+            if not ENABLED:
+                return await node(state)
+            key = input_key(state, kind)
+            hit = get(key)
+            if hit is not None:
+                return hit
+            result = await node(state)
+            if _cacheable(result):
+                put(key, result)
+            return result
+        return run_async
+
+    @wraps(node)
+    def run(state):
+        if not ENABLED:
+            return node(state)
+        key = input_key(state, kind)
+        hit = get(key)
+        if hit is not None:
+            return hit
+        result = node(state)
+        if _cacheable(result):
+            put(key, result)
+        return result
+    return run
@@ -1,9 +1,39 @@
-from playwright.sync_api import sync_playwright
 from PIL import Image
 import numpy as np
 from .io_tools import root_path, ensure_dir
+from .browser_pool import get_pool, on_browser_thread
+from .perf_runner import get_perf_runner
+from .ssim import ssim, ms_ssim
+from .target_cache import load_target
+from .artifacts import dissimilarity_image
+from .roi import element_boxes
+from .preview import READY_ATTR
+from ..trace import traced
 from pathlib import Path
-import json, subprocess, shutil
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import base64, hashlib, json, os, subprocess, shutil, urllib.request
+
+AXE_VERSION = "4.9.1"
+AXE_CDN = f"https://cdn.jsdelivr.net/npm/axe-core@{AXE_VERSION}/axe.min.js"
+AXE_CACHE_REL = f"agents/.cache/axe-core-{AXE_VERSION}.min.js"
+# sha256 (hex) of that exact axe.min.js, checked in next to the code. A download is
+# only cached (and injected into pages) if it matches; AXE_SHA256 overrides the file.
+AXE_SHA256_REL = f"agents/axe-core-{AXE_VERSION}.sha256"
+READY_TIMEOUT_MS = int(os.getenv("QA_READY_TIMEOUT_MS", "15000"))
+
+# Visual similarity metric: "ssim" (default) or "ms_ssim". QA_SSIM_REJECT_BELOW
+# enables the coarse-level early reject for candidate renders (see candidates.py).
+METRICS = {"ssim": ssim, "ms_ssim": ms_ssim}
+SSIM_METRIC = os.getenv("QA_SSIM_METRIC", "ssim")
+REJECT_BELOW = float(os.environ["QA_SSIM_REJECT_BELOW"]) if os.getenv("QA_SSIM_REJECT_BELOW") else None
+
+# Pages that render <html data-qa-ready="0"> flip it to "1" once fonts, media and
+# URL overrides have settled; QA waits for that instead of network idle. Pages
+# without the attribute (external URLs) still fall back to networkidle.
+READY_SELECTOR = f'html[{READY_ATTR}="1"]'
+HAS_MARKER_JS = f"() => document.documentElement.hasAttribute('{READY_ATTR}')"
 
 # --- Helpers ---------------------------------------------------------------
 
@@ -20,65 +50,251 @@ def _new_context(browser, width=1280, height=720):
         color_scheme="light",
     )
 
+@traced("page.goto")
+def _goto(page, url: str):
+    """Navigate and wait until the page reports ready (or, without a marker, network idle)."""
+    page.goto(url, wait_until="load")
+    if page.evaluate(HAS_MARKER_JS):
+        page.wait_for_selector(READY_SELECTOR, state="attached", timeout=READY_TIMEOUT_MS)
+    else:
+        page.wait_for_load_state("networkidle")
+
+def axe_path() -> Path:
+    """Where the axe-core build is read from: AXE_PATH, else the agents/.cache copy."""
+    override = os.getenv("AXE_PATH")
+    return Path(override) if override else root_path(AXE_CACHE_REL)
+
+def axe_sha256() -> str | None:
+    """The pinned digest of axe.min.js (AXE_SHA256, else AXE_SHA256_REL), if any."""
+    pinned = os.getenv("AXE_SHA256")
+    if not pinned:
+        f = root_path(AXE_SHA256_REL)
+        pinned = f.read_text("utf-8").split()[0] if f.exists() and f.read_text("utf-8").strip() else None
+    return pinned.lower() if pinned else None
+
+def _download_axe(p: Path):
+    """Fetch the pinned axe-core build and cache it only if its sha256 matches the pin."""
+    pinned = axe_sha256()
+    if not pinned:
+        raise RuntimeError(
+            f"refusing to download axe-core {AXE_VERSION} without a pinned sha256: "
+            f"record it in {AXE_SHA256_REL} (or AXE_SHA256), or point AXE_PATH at a local axe.min.js"
+        )
+    with urllib.request.urlopen(AXE_CDN, timeout=30) as r:
+        data = r.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if digest != pinned:
+        raise RuntimeError(f"axe-core download from {AXE_CDN} has sha256 {digest}, expected {pinned}")
+    ensure_dir(p)
+    tmp = p.with_suffix(".part")
+    tmp.write_bytes(data)
+    tmp.replace(p)
+
+@lru_cache(maxsize=1)
+def _axe_source() -> str:
+    """
+    axe-core script text. Uses AXE_PATH if set, else the copy cached under
+    agents/.cache (downloaded once from jsdelivr and checked against the pinned
+    sha256, unless AXE_DOWNLOAD=0), so runs after the first are offline.
+    """
+    p = axe_path()
+    if not p.exists():
+        if os.getenv("AXE_PATH"):
+            raise FileNotFoundError(f"AXE_PATH points to a missing file: {p}")
+        if os.getenv("AXE_DOWNLOAD", "1") == "0":
+            raise FileNotFoundError(f"axe-core {AXE_VERSION} not cached at {p} and AXE_DOWNLOAD=0; set AXE_PATH")
+        _download_axe(p)
+    return p.read_text(encoding="utf-8")
+
+@traced("axe.run")
+def _axe_violations(page) -> list[dict]:
+    """Inject the local axe-core build and return normalized violations."""
+    page.add_script_tag(content=_axe_source())
+    return _normalize_axe(page.evaluate("async () => await axe.run()"))
+
+def _normalize_axe(a11y: dict) -> list[dict]:
+    # normalize to simple list of {id, impact, nodesCount}
+    return [
+        {"id": v.get("id"), "impact": v.get("impact"), "nodes": len(v.get("nodes", []))}
+        for v in a11y.get("violations", [])
+    ]
+
 # --- Visual QA -------------------------------------------------------------
 
+@traced()
+@on_browser_thread
 def screenshot(url: str, out_rel: str, width=1280, height=720):
     """Open URL and save a screenshot at the given viewport size with zoom locked."""
     out = root_path(out_rel); ensure_dir(out)
-    with sync_playwright() as pw:
-        browser = pw.chromium.launch()
-        ctx = _new_context(browser, width=width, height=height)
+    with get_pool().context(width=width, height=height) as ctx:
         page = ctx.new_page()
-        page.goto(url, wait_until="networkidle")
+        _goto(page, url)
         page.screenshot(path=str(out), full_page=False)
-        ctx.close()
-        browser.close()
     return str(out)
 
+@traced("page.capture")
+def _grab_frame(page) -> np.ndarray:
+    """
+    Viewport pixels as an HxWx3 uint8 array, without touching disk.
+    Uses CDP's fast PNG encoder when available, else page.screenshot() bytes.
+    """
+    try:
+        cdp = page.context.new_cdp_session(page)
+        try:
+            data = cdp.send("Page.captureScreenshot", {"format": "png", "optimizeForSpeed": True})
+        finally:
+            cdp.detach()
+        buf = base64.b64decode(data["data"])
+    except Exception:
+        buf = page.screenshot(full_page=False, type="png")
+    return np.asarray(Image.open(BytesIO(buf)).convert("RGB"))
+
+def _load_rgb(src, size) -> np.ndarray:
+    """A repo-relative image path or an in-memory RGB frame, at the given size."""
+    if isinstance(src, np.ndarray):
+        if src.shape[1::-1] == tuple(size):
+            return src
+        return np.asarray(Image.fromarray(src).resize(size))
+    return np.asarray(Image.open(root_path(src)).convert("RGB").resize(size))
+
+@traced()
+def visual_report(a, b_rel: str, size=(1280, 720), tiles=(8, 8), metric: str | None = None,
+                  reject_below: float | None = None):
+    """
+    SSIM (or MS-SSIM, metric="ms_ssim") of two images on luminance: global score plus
+    a rows×cols tile map. a is a path or an in-memory frame; b_rel is the (fixed)
+    target and comes from the memory-mapped target cache. With reject_below, a frame
+    whose coarse level already scores lower is reported from that level, with
+    "rejected": True (its map is then at 1/4 of the target's SSIM scale).
+    Returns (report, ssim_map).
+    """
+    metric = metric or SSIM_METRIC
+    if metric not in METRICS:
+        raise ValueError(f"unknown SSIM metric {metric!r} (expected one of {sorted(METRICS)})")
+    res = METRICS[metric](_load_rgb(a, size), prepared_b=load_target(b_rel, size), tiles=tiles,
+                          reject_below=reject_below)
+    worst = min(
+        ((r, c, v) for r, row in enumerate(res["tiles"]) for c, v in enumerate(row)),
+        key=lambda t: t[2],
+    )
+    rep = {
+        "similarity": max(0.0, res["ssim"]),  # 1.0 is identical
+        "tiles": [[round(v, 4) for v in row] for row in res["tiles"]],
+        "worstTile": {"row": worst[0], "col": worst[1], "ssim": round(worst[2], 4)},
+        "metric": metric,
+    }
+    if res["rejected"]:
+        rep["rejected"] = True
+    return rep, res["map"]
+
+@traced()
 def visual_diff(a_rel: str, b_rel: str, out_rel: str, size=(1280, 720)):
-    """Return (similarity, out_diff_path). Simple MAE-based similarity."""
-    a = Image.open(root_path(a_rel)).convert("RGB").resize(size)
-    b = Image.open(root_path(b_rel)).convert("RGB").resize(size)
-    a_np, b_np = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
-    mae = np.mean(np.abs(a_np - b_np))  # 0..255
-    similarity = max(0.0, 1.0 - (mae / 255.0))  # 1.0 is identical
-
-    # visual diff (highlight differences)
-    diff = (np.abs(a_np - b_np)).astype(np.uint8)
-    diff_img = Image.fromarray(diff)
+    """Return (similarity, out_diff_path). SSIM similarity; the diff is the dissimilarity map."""
+    rep, m = visual_report(a_rel, b_rel, size=size)
     out = root_path(out_rel); ensure_dir(out)
-    diff_img.save(out)
-    return float(similarity), str(out)
+    Image.fromarray(dissimilarity_image(m)).save(out)
+    return float(rep["similarity"]), str(out)
+
+@traced()
+def visual_reports(frames: list, targets: list[str], size=(1280, 720)) -> list[dict]:
+    """
+    `visual_report` for a batch of frames (each against its own target), scored
+    concurrently: the SSIM work is numpy and releases the GIL. Returns the reports
+    in order, without the SSIM maps.
+    """
+    if not frames:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(frames), os.cpu_count() or 1)) as ex:
+        return [rep for rep, _ in ex.map(lambda ft: visual_report(ft[0], ft[1], size=size), zip(frames, targets))]
 
 # --- Accessibility QA ------------------------------------------------------
 
+@traced()
+@on_browser_thread
 def run_axe(url: str, width=1280, height=720):
     """Return axe violations array with 'impact' levels. Uses locked zoom context."""
-    with sync_playwright() as pw:
-        browser = pw.chromium.launch()
-        ctx = _new_context(browser, width=width, height=height)
+    with get_pool().context(width=width, height=height) as ctx:
         page = ctx.new_page()
-        page.goto(url, wait_until="networkidle")
-        # inject axe
-        page.add_script_tag(url="https://cdn.jsdelivr.net/npm/axe-core@4.9.1/axe.min.js")
-        a11y = page.evaluate("async () => await axe.run()")
-        ctx.close()
-        browser.close()
+        _goto(page, url)
+        return _axe_violations(page)
 
-    # normalize to simple list of {id, impact, nodesCount}
-    violations = [
-        {"id": v.get("id"), "impact": v.get("impact"), "nodes": len(v.get("nodes", []))}
-        for v in a11y.get("violations", [])
-    ]
-    return violations
+# --- Combined capture ------------------------------------------------------
+
+@traced()
+@on_browser_thread
+def capture(url: str, width=1280, height=720, regions: dict | None = None):
+    """
+    Load the page once, grab the viewport frame in memory, then run axe in the same page.
+    regions maps names to CSS selectors whose bounding boxes are collected too.
+    Returns (frame HxWx3 uint8, violations, {name: [x, y, w, h]}).
+    """
+    with get_pool().context(width=width, height=height) as ctx:
+        page = ctx.new_page()
+        _goto(page, url)
+        frame = _grab_frame(page)  # before axe touches the DOM
+        boxes = element_boxes(page, regions or {})
+        violations = _axe_violations(page)
+    return frame, violations, boxes
+
+# --- Timeline QA -----------------------------------------------------------
+
+# Jump the page to time `t` (seconds): a <video> timeline is paused and seeked
+# (resolves on "seeked", plus a timeupdate so the cue index follows at once); a
+# clock-driven timeline (no <video>) returns false and is advanced with page.clock.
+SEEK_JS = """async (t) => {
+  const v = document.querySelector("video");
+  if (!v) return false;
+  v.pause();
+  if (Math.abs(v.currentTime - t) > 1e-3) {
+    await new Promise((r) => { v.addEventListener("seeked", r, { once: true }); v.currentTime = t; });
+  }
+  v.dispatchEvent(new Event("timeupdate"));
+  return true;
+}"""
+TEXT_JS = "(s) => document.body.innerText.includes(s)"
+SETTLE_JS = "() => new Promise((r) => requestAnimationFrame(() => requestAnimationFrame(r)))"
+
+@traced()
+@on_browser_thread
+def capture_cues(url: str, cues: list[dict], width=1280, height=720) -> list[np.ndarray]:
+    """
+    Load the page once, then for each cue ({"mid", "subheading"}) jump to its
+    midpoint and grab the viewport in memory. The page's clock is installed
+    before navigation so clock-mode timelines can be fast-forwarded too.
+    """
+    frames = []
+    with get_pool().context(width=width, height=height) as ctx:
+        page = ctx.new_page()
+        page.clock.install()
+        _goto(page, url)
+        at = 0.0
+        for cue in cues:
+            if not page.evaluate(SEEK_JS, cue["mid"]):
+                page.clock.run_for(max(0, int((cue["mid"] - at) * 1000)))
+                at = cue["mid"]
+            if cue.get("subheading"):
+                page.wait_for_function(TEXT_JS, arg=cue["subheading"], timeout=READY_TIMEOUT_MS)
+            page.evaluate(SETTLE_JS)
+            frames.append(_grab_frame(page))
+    return frames
 
 # --- Performance QA --------------------------------------------------------
 
+@traced()
 def run_lighthouse(url: str):
     """
-    Run Lighthouse via pnpm dlx (preferred) or npx fallback.
-    Returns {"performance": 0..100, "raw": <optional>}.
+    Run Lighthouse on the warm runner (cached CLI + persistent Chrome).
+    Falls back to a one-shot pnpm dlx / npx run only if the runner can't start;
+    a failed audit is reported as is (a cold run of the same page would fail too).
+    Returns {"performance": 0..100, maybe "error": "..."}.
     """
+    res = get_perf_runner().run(url)
+    if not res.pop("unavailable", False):
+        return res
+    return _run_lighthouse_cold(url)
+
+def _run_lighthouse_cold(url: str):
+    """Run Lighthouse via pnpm dlx (preferred) or npx fallback."""
     cmds = []
     if shutil.which("pnpm"):
         cmds.append([
@@ -0,0 +1,111 @@
+from .ssim import ssim, to_luma
+from .target_cache import load_target, load_region
+from ..trace import traced
+import numpy as np
+
+# Region-of-interest scoring: SSIM over the crops of named elements (from
+# hero.<element>.selector in ui_spec) plus a background score, so a few-px shift
+# of one element isn't diluted by the whole frame.
+
+MARGIN = 8  # px of context around each element box
+
+# which region a spacing knob moves
+KNOB_REGIONS = {
+    "heroTopGap": "header",
+    "headlineGap": "header",
+    "phoneTopGap": "centerpiece",
+    "phoneToBadgeGap": "badge",
+}
+
+# hero elements in vertical flow order: anything that moves or resizes one shifts the rest
+FLOW = ("header", "centerpiece", "badge")
+
+def dirty_regions(pointers) -> set[str]:
+    """
+    Regions whose pixels can change after edits to these spec paths (JSON pointers from
+    spec_resolver): the edited element or knob region, every element after it in FLOW,
+    and always "background". The whole-document pointer "" marks every region dirty.
+    """
+    out = {"background"}
+    for ptr in pointers:
+        if ptr == "":
+            return set(FLOW) | out
+        parts = ptr.strip("/").split("/")
+        if len(parts) < 2 or parts[0] != "hero":
+            return set(FLOW) | out  # outside the hero: assume everything moved
+        name = KNOB_REGIONS.get(parts[2]) if parts[1] == "layout" and len(parts) > 2 else parts[1]
+        if name in FLOW:
+            out.update(FLOW[FLOW.index(name):])
+        elif name != "tuning":
+            return set(FLOW) | out
+    return out
+
+# union of the visible boxes of every element matching each selector
+BOXES_JS = """
+(selectors) => {
+  const out = {};
+  const vw = window.innerWidth, vh = window.innerHeight;
+  for (const [name, sel] of Object.entries(selectors)) {
+    let x0 = Infinity, y0 = Infinity, x1 = -Infinity, y1 = -Infinity;
+    for (const el of document.querySelectorAll(sel)) {
+      const r = el.getBoundingClientRect();
+      if (r.width <= 0 || r.height <= 0) continue;
+      x0 = Math.min(x0, r.left); y0 = Math.min(y0, r.top);
+      x1 = Math.max(x1, r.right); y1 = Math.max(y1, r.bottom);
+    }
+    x0 = Math.max(0, x0); y0 = Math.max(0, y0); x1 = Math.min(vw, x1); y1 = Math.min(vh, y1);
+    if (x1 > x0 && y1 > y0) out[name] = [x0, y0, x1 - x0, y1 - y0];
+  }
+  return out;
+}
+"""
+
+def region_selectors(ui: dict) -> dict:
+    """{element name: CSS selector} for every hero.<element>.selector in the spec."""
+    hero = (ui or {}).get("hero", {}) or {}
+    return {name: v["selector"] for name, v in hero.items() if isinstance(v, dict) and v.get("selector")}
+
+def element_boxes(page, selectors: dict) -> dict:
+    """{name: [x, y, w, h]} in CSS px (= device px at DSF 1); missing elements are omitted."""
+    if not selectors:
+        return {}
+    return page.evaluate(BOXES_JS, selectors)
+
+def _crop(box, size):
+    x, y, w, h = box
+    W, H = size
+    x0, y0 = max(0, int(x) - MARGIN), max(0, int(y) - MARGIN)
+    x1, y1 = min(W, int(np.ceil(x + w)) + MARGIN), min(H, int(np.ceil(y + h)) + MARGIN)
+    return x0, y0, x1, y1
+
+@traced()
+def score_regions(frame: np.ndarray, target_rel: str, size, boxes: dict,
+                  ssim_map: np.ndarray | None = None, only: set | None = None) -> dict:
+    """
+    Per-region SSIM over element crops at full resolution, plus "background":
+    the global SSIM map averaged outside every element box.
+    `only` limits which regions are recomputed (others are skipped).
+    """
+    target = load_target(target_rel, size)
+    out = {}
+    for name, box in boxes.items():
+        if only is not None and name not in only:
+            continue
+        x0, y0, x1, y1 = _crop(box, size)
+        a = to_luma(frame[y0:y1, x0:x1])
+        if min(a.shape) <= 7:
+            continue  # too small for the SSIM window
+        res = ssim(a, prepared_b=load_region(target_rel, size, (x0, y0, x1, y1)), tiles=None)
+        out[name] = {"box": [x0, y0, x1 - x0, y1 - y0], "ssim": round(res["ssim"], 4)}
+
+    if ssim_map is not None and (only is None or "background" in only):
+        s = target["scale"]
+        win = target["win"]
+        mask = np.ones(ssim_map.shape, dtype=bool)
+        for box in boxes.values():
+            x0, y0, x1, y1 = _crop(box, size)
+            # map rows/cols are window origins at 1/s resolution
+            mask[max(0, y0 // s - win + 1): y1 // s, max(0, x0 // s - win + 1): x1 // s] = False
+        if mask.any():
+            out["background"] = {"ssim": round(float(ssim_map[mask].mean()), 4)}
+    return out
@@ -0,0 +1,153 @@
+from .spec_store import copy_json, store
+import threading
+
+# "$spacing.phoneWidth" / "$copy.headline" references in ui_spec, resolved the way
+# site/src/lib/spec.ts does it (context = {**tokens, "copy": copy}), compiled once
+# into a resolved view plus a reverse index: token path -> spec paths that use it.
+# A token edit re-resolves only its dependents and reports them, so QA can re-check
+# just the affected elements. Tokens no $ref mentions can still be read directly by
+# spec.ts (typography.h1.px, spacing.phoneScreenInset...): an edit to one of those
+# reports the whole-document pointer "" instead, i.e. everything may have changed.
+
+WHOLE = ""  # JSON pointer to the whole spec
+
+def _pointer(path: tuple) -> str:
+    return "/" + "/".join(str(p).replace("~", "~0").replace("/", "~1") for p in path)
+
+def _related(a: tuple, b: tuple) -> bool:
+    """One token path is a prefix of the other (editing either changes the value at both)."""
+    n = min(len(a), len(b))
+    return a[:n] == b[:n]
+
+def changed_paths(old, new, prefix: tuple = ()) -> list[tuple]:
+    """Leaf-most token paths whose values differ between two JSON trees."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        out = []
+        for k in old.keys() | new.keys():
+            if k not in old or k not in new:
+                out.append((*prefix, k))
+            else:
+                out += changed_paths(old[k], new[k], (*prefix, k))
+        return out
+    return [] if old == new else [prefix]
+
+
+class ResolvedSpec:
+    """Compiled ui_spec: `view` has every $ref substituted; `deps` maps token paths to spec paths."""
+
+    def __init__(self, ui: dict, tokens: dict, copy: dict):
+        self.ui = copy_json(ui)
+        self.tokens = copy_json(tokens)
+        self.copy = copy_json(copy)
+        self.refs: dict[tuple, tuple] = {}         # spec path -> token path
+        self.deps: dict[tuple, set[tuple]] = {}    # token path -> spec paths
+        self.unresolved: dict[tuple, str] = {}     # spec path -> "$ref" that didn't resolve
+        self._collect(self.ui, ())
+        for spec_path, tok in self.refs.items():
+            self.deps.setdefault(tok, set()).add(spec_path)
+        self.view = self._resolve_tree(self.ui, ())
+
+    def _ctx(self) -> dict:
+        return {**self.tokens, "copy": self.copy}
+
+    def _collect(self, node, path: tuple):
+        if isinstance(node, str) and node.startswith("$"):
+            self.refs[path] = tuple(node[1:].split("."))
+        elif isinstance(node, dict):
+            for k, v in node.items():
+                self._collect(v, (*path, k))
+        elif isinstance(node, list):
+            for i, v in enumerate(node):
+                self._collect(v, (*path, i))
+
+    def _lookup(self, spec_path: tuple):
+        ref = self.refs[spec_path]
+        acc = self._ctx()
+        for k in ref:
+            if not isinstance(acc, dict) or k not in acc:
+                self.unresolved[spec_path] = "$" + ".".join(ref)
+                return "$" + ".".join(ref)  # left as-is (spec.ts would throw)
+            acc = acc[k]
+        self.unresolved.pop(spec_path, None)
+        return copy_json(acc)
+
+    def _resolve_tree(self, node, path: tuple):
+        if path in self.refs:
+            return self._lookup(path)
+        if isinstance(node, dict):
+            return {k: self._resolve_tree(v, (*path, k)) for k, v in node.items()}
+        if isinstance(node, list):
+            return [self._resolve_tree(v, (*path, i)) for i, v in enumerate(node)]
+        return node
+
+    def get(self, *path):
+        """Resolved value at a spec path, e.g. get("hero", "centerpiece", "width")."""
+        cur = self.view
+        for p in path:
+            cur = cur[p]
+        return cur
+
+    def dependents(self, token_path: str | tuple) -> set[tuple]:
+        tok = tuple(token_path.split(".")) if isinstance(token_path, str) else tuple(token_path)
+        return {sp for t, paths in self.deps.items() if _related(t, tok) for sp in paths}
+
+    def update(self, token_path: str | tuple, value) -> list[str]:
+        """
+        Set a token ("spacing.headlineGap" or ("copy", "headline")) and re-resolve only the
+        spec paths that depend on it. Returns those paths as JSON pointers, or [WHOLE]
+        when no $ref uses the token (the site may read it directly).
+        """
+        tok = tuple(token_path.split(".")) if isinstance(token_path, str) else tuple(token_path)
+        root, key = (self.copy, tok[1:]) if tok[0] == "copy" else (self.tokens, tok)
+        cur = root
+        for k in key[:-1]:
+            cur = cur.setdefault(k, {})
+        cur[key[-1]] = copy_json(value)
+
+        affected = sorted(self.dependents(tok), key=_pointer)
+        for sp in affected:
+            parent = self.view
+            for p in sp[:-1]:
+                parent = parent[p]
+            parent[sp[-1]] = self._lookup(sp)
+        return [_pointer(sp) for sp in affected] if affected else [WHOLE]
+
+
+_current: ResolvedSpec | None = None
+_lock = threading.Lock()
+
+def sync(sync_tokens: bool = True) -> tuple[ResolvedSpec, list[str] | None]:
+    """
+    Bring the resolved view in line with the specs on disk. Returns (view, affected):
+    affected is None when ui_spec or copy changed (full recompile), else the spec
+    pointers touched by tokens edited on disk since the last sync/update_token
+    (WHOLE among them when an edited token has no $ref dependents).
+    With sync_tokens=False in-memory token edits not yet written back are kept.
+    """
+    global _current
+    ui = store.read("specs/ui_spec.json")
+    tokens = store.read("specs/tokens.json")
+    copy = store.read("specs/copy.json")
+    with _lock:
+        rs = _current
+        if rs is None or rs.ui != ui or rs.copy != copy:
+            _current = ResolvedSpec(ui, tokens, copy)
+            return _current, None
+        affected: set[str] = set()
+        if sync_tokens and rs.tokens != tokens:
+            for path in changed_paths(rs.tokens, tokens):
+                value = tokens
+                for k in path:
+                    value = value.get(k) if isinstance(value, dict) else None
+                affected.update(rs.update(path, value))
+        return rs, sorted(affected)
+
+def resolved_spec() -> ResolvedSpec:
+    """The resolved view of the specs on disk (recompiled only when ui_spec/copy change)."""
+    return sync()[0]
+
+def update_token(token_path: str, value) -> list[str]:
+    """Apply one token edit to the resolved view; returns the affected spec pointers."""
+    rs, _ = sync(sync_tokens=False)
+    with _lock:
+        return rs.update(token_path, value)
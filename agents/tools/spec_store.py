@@ -0,0 +1,182 @@
+from .io_tools import root_path
+from ..trace import count
+from contextlib import contextmanager
+from functools import lru_cache
+import hashlib, json, os, tempfile, threading
+
+# In-memory cache of the JSON specs, validated against the file on every read:
+# an unchanged (mtime, size) is a hit; a changed stat with identical bytes (touch,
+# another process rewriting the same content) is a hit too; anything else re-parses.
+# Writes go through an atomic temp-file + rename, so concurrent processes only ever
+# see a whole old file or a whole new one. Inside `batch()` writes are staged and
+# flushed once when the outermost batch exits (e.g. once per critic step).
+
+BOM = "﻿"
+
+def copy_json(o):
+    """Deep copy of a JSON tree (dict/list/scalars); several times faster than copy.deepcopy."""
+    if isinstance(o, dict):
+        return {k: copy_json(v) for k, v in o.items()}
+    if isinstance(o, list):
+        return [copy_json(v) for v in o]
+    return o
+
+def _stat_key(p) -> tuple[int, int] | None:
+    try:
+        st = os.stat(p)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def _dumps(data, bom: bool) -> bytes:
+    return ((BOM if bom else "") + json.dumps(data, indent=2)).encode("utf-8")
+
+def atomic_write_bytes(path, data: bytes):
+    """Write via a sibling temp file + fsync + os.replace (readers never see a torn file)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class _Entry:
+    __slots__ = ("stat", "digest", "data", "bom")
+
+    def __init__(self, stat, digest, data, bom):
+        self.stat, self.digest, self.data, self.bom = stat, digest, data, bom
+
+
+class SpecStore:
+    """Validated read cache + write-through for repo-relative JSON files."""
+
+    def __init__(self):
+        self._entries: dict[str, _Entry] = {}
+        self._staged: dict[str, object] = {}
+        self._depth = 0
+        self._lock = threading.RLock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "skipped_writes": 0}
+
+    def _load(self, rel: str) -> _Entry:
+        p = root_path(rel)
+        st = _stat_key(p)
+        e = self._entries.get(rel)
+        if e is not None and st is not None and e.stat == st:
+            self.stats["hits"] += 1
+            count("spec_store.hit")
+            return e
+        raw = p.read_bytes()  # FileNotFoundError propagates, as with the plain read
+        st = _stat_key(p)
+        digest = hashlib.sha256(raw).hexdigest()
+        if e is not None and e.digest == digest:
+            e.stat = st  # same content under a new stat: no re-parse
+            self.stats["hits"] += 1
+            count("spec_store.hit")
+            return e
+        text = raw.decode("utf-8")
+        bom = text.startswith(BOM)
+        e = _Entry(st, digest, json.loads(text[1:] if bom else text), bom)
+        self._entries[rel] = e
+        self.stats["misses"] += 1
+        count("spec_store.miss")
+        return e
+
+    def read(self, rel: str):
+        """Parsed JSON (a private copy: callers may mutate it freely)."""
+        with self._lock:
+            if rel in self._staged:
+                return copy_json(self._staged[rel])
+            return copy_json(self._load(rel).data)
+
+    def write(self, rel: str, data):
+        """Write-through (or stage, inside `batch()`); a file's BOM is preserved."""
+        with self._lock:
+            if self._depth:
+                self._staged[rel] = copy_json(data)
+                return
+            self._flush_one(rel, data)
+
+    def _flush_one(self, rel: str, data):
+        p = root_path(rel)
+        old = self._entries.get(rel)
+        if old is None and p.exists():
+            old = self._load(rel)
+        bom = bool(old and old.bom)
+        raw = _dumps(data, bom)
+        digest = hashlib.sha256(raw).hexdigest()
+        if old is not None and old.digest == digest and _stat_key(p) == old.stat:
+            self.stats["skipped_writes"] += 1  # byte-identical: leave the file (and its mtime) alone
+            return
+        atomic_write_bytes(p, raw)
+        count("bytes_written", len(raw))
+        self.stats["writes"] += 1
+        self._entries[rel] = _Entry(_stat_key(p), digest, copy_json(data), bom)
+
+    @contextmanager
+    def batch(self):
+        """Stage writes and flush each file once when the outermost batch exits cleanly."""
+        with self._lock:
+            self._depth += 1
+        ok = False
+        try:
+            yield self
+            ok = True
+        finally:
+            with self._lock:
+                self._depth -= 1
+                if self._depth == 0:
+                    staged, self._staged = self._staged, {}
+                    if ok:
+                        for rel, data in staged.items():
+                            self._flush_one(rel, data)
+
+    def invalidate(self, rel: str | None = None):
+        with self._lock:
+            if rel is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(rel, None)
+
+
+store = SpecStore()
+
+# --- JSON pointers (RFC 6901) ----------------------------------------------
+
+@lru_cache(maxsize=256)
+def compile_pointer(pointer: str) -> tuple[str, ...]:
+    """'/hero/layout/phoneTopGap' -> ('hero', 'layout', 'phoneTopGap'), with ~1/~0 unescaped."""
+    if pointer == "":
+        return ()  # the whole document ("/" is the key "", as in RFC 6901)
+    if not pointer.startswith("/"):
+        raise ValueError(f"JSON pointer must start with '/': {pointer!r}")
+    return tuple(t.replace("~1", "/").replace("~0", "~") for t in pointer[1:].split("/"))
+
+def _step(cur, token: str):
+    if isinstance(cur, list):
+        return cur[int(token)]
+    return cur[token]
+
+def set_pointer(doc, tokens: tuple[str, ...], value):
+    """Set doc[tokens...] = value; list parents take an index or '-' (append)."""
+    if not tokens:
+        raise ValueError("cannot replace the document root")
+    cur = doc
+    for t in tokens[:-1]:
+        cur = _step(cur, t)
+    last = tokens[-1]
+    if isinstance(cur, list):
+        if last == "-":
+            cur.append(value)
+        else:
+            cur[int(last)] = value
+    else:
+        cur[last] = value
@@ -0,0 +1,158 @@
+import numpy as np
+
+# SSIM / MS-SSIM on luminance, vectorized with NumPy.
+# Local means come from integral images (box window) or a separable Gaussian,
+# so a 1920×1080 comparison stays well under 100 ms.
+
+C1 = 0.01 ** 2            # stabilizers for data in [0, 1]
+C2 = 0.03 ** 2
+LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)  # BT.601
+MS_WEIGHTS = (0.0448, 0.2856, 0.3001, 0.2363, 0.1333)     # Wang et al. 2003
+REJECT_FACTOR = 4  # the early-reject check scores the image at 1/4 of the working scale
+
+def to_luma(img) -> np.ndarray:
+    """HxWx3 uint8/float RGB (0..255) or HxW gray → float32 luminance in [0, 1]."""
+    x = np.asarray(img)
+    if x.ndim == 3:
+        x = x[..., :3].astype(np.float32, copy=False) @ LUMA
+    return x.astype(np.float32, copy=False) / np.float32(255.0)
+
+def auto_scale(h: int, w: int) -> int:
+    """Reference SSIM downsampling factor: roughly one pixel per 1/256 of the short side."""
+    return max(1, int(round(min(h, w) / 256)))
+
+def downsample(x: np.ndarray, f: int) -> np.ndarray:
+    """Average-pool by an integer factor (crops the ragged edge)."""
+    if f <= 1:
+        return x
+    h, w = (x.shape[0] // f) * f, (x.shape[1] // f) * f
+    return x[:h, :w].reshape(h // f, f, w // f, f).mean(axis=(1, 3), dtype=np.float32)
+
+# --- Local statistics ------------------------------------------------------
+
+def _box_mean(x: np.ndarray, win: int) -> np.ndarray:
+    """Valid-mode box filter via a (float64) integral image."""
+    s = np.zeros((x.shape[0] + 1, x.shape[1] + 1), dtype=np.float64)
+    np.cumsum(x, axis=0, dtype=np.float64, out=s[1:, 1:])
+    np.cumsum(s[1:, 1:], axis=1, out=s[1:, 1:])
+    tot = s[win:, win:] - s[:-win, win:] - s[win:, :-win] + s[:-win, :-win]
+    return (tot / (win * win)).astype(np.float32)
+
+def _gaussian_kernel(win: int, sigma: float) -> np.ndarray:
+    r = np.arange(win, dtype=np.float64) - (win - 1) / 2
+    k = np.exp(-(r * r) / (2 * sigma * sigma))
+    return (k / k.sum()).astype(np.float32)
+
+def _gaussian_mean(x: np.ndarray, win: int, sigma: float = 1.5) -> np.ndarray:
+    """Valid-mode separable Gaussian filter."""
+    k = _gaussian_kernel(win, sigma)
+    v = np.lib.stride_tricks.sliding_window_view(x, win, axis=0) @ k
+    return np.lib.stride_tricks.sliding_window_view(v, win, axis=1) @ k
+
+def _mean(x, win, window):
+    return _gaussian_mean(x, win) if window == "gaussian" else _box_mean(x, win)
+
+def window_stats(x: np.ndarray, win: int = 7, window: str = "box") -> dict:
+    """Per-window mean and mean-of-squares of one image (reusable for a fixed target)."""
+    return {"mu": _mean(x, win, window), "sq": _mean(x * x, win, window)}
+
+def ssim_maps(a: np.ndarray, b: np.ndarray, win: int = 7, window: str = "box", stats_b: dict | None = None):
+    """Return (ssim_map, cs_map) for two same-size luminance images."""
+    sa = window_stats(a, win, window)
+    sb = stats_b or window_stats(b, win, window)
+    mu_a, mu_b = sa["mu"], sb["mu"]
+    var_a = np.maximum(sa["sq"] - mu_a * mu_a, 0)
+    var_b = np.maximum(sb["sq"] - mu_b * mu_b, 0)
+    cov = _mean(a * b, win, window) - mu_a * mu_b
+    cs = (2 * cov + C2) / (var_a + var_b + C2)
+    lum = (2 * mu_a * mu_b + C1) / (mu_a * mu_a + mu_b * mu_b + C1)
+    return lum * cs, cs
+
+def tile_scores(m: np.ndarray, tiles=(8, 8)) -> list[list[float]]:
+    """Mean of a score map over a rows×cols grid (row-major, top-left first)."""
+    rows, cols = tiles
+    ys = np.linspace(0, m.shape[0], rows + 1).astype(int)
+    xs = np.linspace(0, m.shape[1], cols + 1).astype(int)
+    return [[float(m[ys[r]:ys[r + 1], xs[c]:xs[c + 1]].mean()) for c in range(cols)] for r in range(rows)]
+
+# --- Public API ------------------------------------------------------------
+
+def prepare(b, win: int = 7, scale: int | None = None, window: str = "box") -> dict:
+    """Precompute everything about a fixed reference image that `ssim` needs."""
+    b = b if b.dtype == np.float32 and b.ndim == 2 else to_luma(b)
+    scale = scale or auto_scale(*b.shape)
+    db = downsample(b, scale)
+    return {"shape": b.shape, "scale": scale, "win": win, "window": window,
+            "scaled": db, "stats": window_stats(db, win, window)}
+
+def _luma_pair(a, b, win, scale, window, prepared_b):
+    """(a at the working scale, prepared b), checking the shapes agree."""
+    a = a if a.dtype == np.float32 and a.ndim == 2 else to_luma(a)
+    if prepared_b is None:
+        prepared_b = prepare(b, win, scale, window)
+    if a.shape != tuple(prepared_b["shape"]):
+        raise ValueError(f"shape mismatch: {a.shape} vs {tuple(prepared_b['shape'])}")
+    return downsample(a, prepared_b["scale"]), prepared_b
+
+def _result(s: float, m: np.ndarray, tiles, scale: int, rejected: bool = False) -> dict:
+    return {"ssim": s, "tiles": tile_scores(m, tiles) if tiles else None,
+            "scale": scale, "map": m, "rejected": rejected}
+
+def _coarse_reject(da, db, win, window, scale, tiles, reject_below) -> dict | None:
+    """Score a coarse pyramid level first; its result if it already falls below reject_below."""
+    if reject_below is None:
+        return None
+    ca, cb = downsample(da, REJECT_FACTOR), downsample(db, REJECT_FACTOR)
+    if min(ca.shape) <= win:
+        return None
+    m, _ = ssim_maps(ca, cb, win, window)
+    s = float(m.mean())
+    return _result(s, m, tiles, scale * REJECT_FACTOR, rejected=True) if s < reject_below else None
+
+def ssim(a, b=None, win: int = 7, scale: int | None = None, window: str = "box",
+         tiles=(8, 8), reject_below: float | None = None, prepared_b: dict | None = None) -> dict:
+    """
+    Structural similarity of two images (RGB or luminance, same size).
+    Pass either b or prepared_b (from `prepare`, e.g. a cached target).
+    Returns {"ssim", "tiles", "scale", "map", "rejected"}. With reject_below, a coarse
+    pyramid level is scored first; if it fails, that level's score and map are
+    returned (at its own "scale") with "rejected": True.
+    """
+    da, prepared_b = _luma_pair(a, b, win, scale, window, prepared_b)
+    win, scale, window = prepared_b["win"], prepared_b["scale"], prepared_b["window"]
+    db = prepared_b["scaled"]
+    rejected = _coarse_reject(da, db, win, window, scale, tiles, reject_below)
+    if rejected:
+        return rejected
+    m, _ = ssim_maps(da, db, win, window, prepared_b["stats"])
+    return _result(float(m.mean()), m, tiles, scale)
+
+def ms_ssim(a, b=None, levels: int = 5, win: int = 7, scale: int | None = None, window: str = "box",
+            tiles=(8, 8), reject_below: float | None = None, prepared_b: dict | None = None) -> dict:
+    """
+    Multi-scale SSIM: contrast-structure per level, luminance at the coarsest.
+    Same arguments and result as `ssim` (the map and tiles are the finest level's
+    SSIM map), plus "levels": the per-level values.
+    """
+    da, prepared_b = _luma_pair(a, b, win, scale, window, prepared_b)
+    win, scale, window = prepared_b["win"], prepared_b["scale"], prepared_b["window"]
+    db = prepared_b["scaled"]
+    if min(da.shape) <= win:
+        raise ValueError(f"image too small for a {win}px window: {da.shape}")
+    rejected = _coarse_reject(da, db, win, window, scale, tiles, reject_below)
+    if rejected:
+        return {**rejected, "levels": []}
+    weights = np.array(MS_WEIGHTS[:levels], dtype=np.float64)
+    per_level, finest = [], None
+    for i in range(levels):
+        s_map, cs_map = ssim_maps(da, db, win, window, prepared_b["stats"] if i == 0 else None)
+        if finest is None:
+            finest = s_map
+        last = i == levels - 1 or min(da.shape) // 2 <= win
+        per_level.append(float(s_map.mean() if last else cs_map.mean()))
+        if last:
+            weights = weights[:i + 1] / weights[:i + 1].sum()
+            break
+        da, db = downsample(da, 2), downsample(db, 2)
+    vals = np.maximum(np.array(per_level), 0.0)
+    return {**_result(float(np.prod(vals ** weights)), finest, tiles, scale), "levels": per_level}
@@ -0,0 +1,101 @@
+from .io_tools import root_path
+from .ssim import auto_scale, prepare, to_luma
+from ..trace import count
+from PIL import Image
+import numpy as np
+import hashlib, os, tempfile, threading
+
+# The target mockup never changes during a run, so decode/resize/normalize it once
+# and keep the result (plus its SSIM window statistics) as memory-mapped .npy files
+# shared by later iterations and by parallel workers.
+
+CACHE_REL = "storage/cache/targets"
+
+_hashes: dict[tuple, str] = {}   # (path, mtime_ns, size) → sha256
+_loaded: dict[str, dict] = {}    # cache key → prepared target
+_regions: dict[tuple, dict] = {}  # (cache key, crop) → prepared crop, oldest first
+MAX_REGIONS = 256                 # crops move with the layout; keep the recent ones
+_lock = threading.Lock()
+
+def file_hash(path) -> str:
+    st = os.stat(path)
+    sig = (str(path), st.st_mtime_ns, st.st_size)
+    h = _hashes.get(sig)
+    if h is None:
+        with open(path, "rb") as f:
+            h = hashlib.sha256(f.read()).hexdigest()
+        _hashes[sig] = h
+    return h
+
+def _save_atomic(path, arr: np.ndarray):
+    """np.save to a temp file, then rename, so concurrent readers never see a partial array."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".npy.part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, np.ascontiguousarray(arr))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def load_target(rel: str, size, win: int = 7, window: str = "box") -> dict:
+    """
+    Prepared target for `ssim(prepared_b=...)`, keyed by file hash + viewport size.
+    Arrays are read-only memmaps; "luma" is the full-size float32 luminance.
+    """
+    src = root_path(rel)
+    w, h = size
+    key = f"{file_hash(src)[:20]}_{w}x{h}_{window}{win}"
+    with _lock:
+        hit = _loaded.get(key)
+        if hit is not None:
+            count("target_cache.hit")
+            return hit
+
+        d = root_path(CACHE_REL); d.mkdir(parents=True, exist_ok=True)
+        files = {name: d / f"{key}.{name}.npy" for name in ("luma", "scaled", "mu", "sq")}
+        if not all(p.exists() for p in files.values()):
+            count("target_cache.miss")
+            luma = to_luma(Image.open(src).convert("RGB").resize((w, h)))
+            prep = prepare(luma, win=win, window=window)
+            arrays = {"luma": luma, "scaled": prep["scaled"],
+                      "mu": prep["stats"]["mu"], "sq": prep["stats"]["sq"]}
+            for name, p in files.items():
+                _save_atomic(p, arrays[name])
+
+        mm = {name: np.load(p, mmap_mode="r") for name, p in files.items()}
+        luma = mm["luma"]
+        entry = {
+            "key": key,
+            "shape": luma.shape,
+            "scale": auto_scale(*luma.shape),
+            "win": win,
+            "window": window,
+            "luma": luma,
+            "scaled": mm["scaled"],
+            "stats": {"mu": mm["mu"], "sq": mm["sq"]},
+        }
+        _loaded[key] = entry
+        return entry
+
+def load_region(rel: str, size, crop, win: int = 7, window: str = "box") -> dict:
+    """
+    Prepared full-resolution crop (x0, y0, x1, y1) of a cached target, for
+    `ssim(prepared_b=...)`. Kept in memory, so an element whose box hasn't moved
+    reuses its window statistics across iterations and candidates.
+    """
+    target = load_target(rel, size, win, window)
+    x0, y0, x1, y1 = crop
+    k = (target["key"], x0, y0, x1, y1)
+    with _lock:
+        hit = _regions.get(k)
+    if hit is not None:
+        count("target_cache.region_hit")
+        return hit
+    count("target_cache.region_miss")
+    prep = prepare(np.asarray(target["luma"][y0:y1, x0:x1]), win=win, scale=1, window=window)
+    with _lock:
+        _regions[k] = prep
+        while len(_regions) > MAX_REGIONS:
+            _regions.pop(next(iter(_regions)))
+    return prep
@@ -0,0 +1,166 @@
+from contextlib import contextmanager
+from collections import defaultdict
+from functools import wraps
+from pathlib import Path
+import asyncio, cProfile, inspect, json, os, pstats, threading, time
+
+# Lightweight run instrumentation: nested timing spans and counters, exported as
+# Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev) plus a per-iteration
+# summary table. Disabled by default; spans cost one attribute check when off.
+
+class Tracer:
+    def __init__(self):
+        self.enabled = os.getenv("TRACE", "0") == "1"
+        self.iteration = 0
+        self.events: list[dict] = []
+        self.counters: dict[str, float] = defaultdict(float)
+        self.profiles: list[cProfile.Profile] | None = None  # per-node cProfile when set
+        self.node_ms: dict[str, float] = {}  # last wall time per graph node (always kept)
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter_ns()
+        self._pid = os.getpid()
+
+    def _now_us(self) -> float:
+        return (time.perf_counter_ns() - self._t0) / 1000
+
+    @staticmethod
+    def _tid() -> int:
+        """Async tasks get their own track so overlapping awaits don't mis-nest."""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        return id(task) if task is not None else threading.get_ident()
+
+    def next_iteration(self) -> int:
+        with self._lock:
+            self.iteration += 1
+            return self.iteration
+
+    @contextmanager
+    def span(self, name: str, cat: str = "tool", **args):
+        if not self.enabled:
+            yield
+            return
+        start = self._now_us()
+        try:
+            yield
+        finally:
+            ev = {
+                "name": name, "cat": cat, "ph": "X", "ts": start, "dur": self._now_us() - start,
+                "pid": self._pid, "tid": self._tid(), "args": {"iteration": self.iteration, **args},
+            }
+            with self._lock:
+                self.events.append(ev)
+
+    def count(self, name: str, value: float = 1):
+        """Add to a running counter (tokens, cache hits, bytes written, …)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += value
+            self.events.append({
+                "name": name, "ph": "C", "ts": self._now_us(), "pid": self._pid,
+                "args": {name: self.counters[name]},
+            })
+
+    # --- export ---
+
+    def export_chrome(self, path):
+        """Write Chrome trace-event JSON (also loads in Perfetto)."""
+        p = Path(path); p.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = {"traceEvents": list(self.events), "displayTimeUnit": "ms",
+                    "otherData": {"counters": dict(self.counters)}}
+        p.write_text(json.dumps(data), encoding="utf-8")
+        return str(p)
+
+    def summary(self) -> dict[int, dict[str, dict]]:
+        """{iteration: {span name: {"count", "total_ms", "max_ms"}}}"""
+        out: dict[int, dict[str, dict]] = defaultdict(dict)
+        with self._lock:
+            spans = [e for e in self.events if e["ph"] == "X"]
+        for e in spans:
+            row = out[e["args"]["iteration"]].setdefault(e["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            ms = e["dur"] / 1000
+            row["count"] += 1
+            row["total_ms"] += ms
+            row["max_ms"] = max(row["max_ms"], ms)
+        return dict(out)
+
+    def summary_table(self) -> str:
+        lines = [f"{'iter':>4}  {'span':<28} {'n':>4} {'total ms':>10} {'max ms':>10}"]
+        for it, rows in sorted(self.summary().items()):
+            for name, r in sorted(rows.items(), key=lambda kv: -kv[1]["total_ms"]):
+                lines.append(f"{it:>4}  {name:<28} {r['count']:>4} {r['total_ms']:>10.1f} {r['max_ms']:>10.1f}")
+        if self.counters:
+            lines.append("counters: " + ", ".join(f"{k}={v:g}" for k, v in sorted(self.counters.items())))
+        return "\n".join(lines)
+
+    def dump_profile(self, path):
+        """Merge the per-node cProfile runs and write a pstats file."""
+        profs = self.profiles or []
+        if not profs:
+            return None
+        stats = pstats.Stats(profs[0])
+        for p in profs[1:]:
+            stats.add(p)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        stats.dump_stats(path)
+        return str(path)
+
+
+tracer = Tracer()
+span = tracer.span
+count = tracer.count
+
+def traced(name: str | None = None, cat: str = "tool"):
+    """Decorator: time every call of a sync or async function as a span."""
+    def deco(fn):
+        label = name or fn.__qualname__
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def arun(*a, **kw):
+                with tracer.span(label, cat):
+                    return await fn(*a, **kw)
+            return arun
+
+        @wraps(fn)
+        def run(*a, **kw):
+            with tracer.span(label, cat):
+                return fn(*a, **kw)
+        return run
+    return deco
+
+@contextmanager
+def _node_timer(name: str):
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        tracer.node_ms[name] = round((time.perf_counter() - t) * 1000, 1)
+
+def traced_node(name: str, fn):
+    """
+    Wrap a graph node: a "node" span, plus a cProfile run when profiling sync nodes.
+    The last wall time of every node is kept in tracer.node_ms even with tracing off.
+    """
+    if inspect.iscoroutinefunction(fn):
+        @wraps(fn)
+        async def arun(state):
+            with _node_timer(name), tracer.span(name, "node"):
+                return await fn(state)
+        return arun
+
+    @wraps(fn)
+    def run(state):
+        with _node_timer(name), tracer.span(name, "node"):
+            if tracer.profiles is None:
+                return fn(state)
+            prof = cProfile.Profile()  # per call: nodes run on worker threads
+            try:
+                return prof.runcall(fn, state)
+            finally:
+                with tracer._lock:
+                    tracer.profiles.append(prof)
+    return run
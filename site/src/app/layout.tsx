@@ -13,7 +13,8 @@ const systemSans =
 
 export default function RootLayout({ children }: { children: React.ReactNode }) {
   return (
-    <html lang="en">
+    // data-qa-ready flips to "1" once the hero has settled (see HeroWithTimeline)
+    <html lang="en" data-qa-ready="0">
       <body style={{ fontFamily: systemSans }}>
         <main>{children}</main>
       </body>
@@ -139,8 +139,81 @@ type HeroMinimalProps = {
   [key: string]: unknown;
 };
 
-export default function HeroWithTimeline({ props }: { props: HeroMinimalProps }) {
+// QA candidate rendering: spacing tokens can be overridden per page load with
+// ?spacing.headlineGap=20&spacing.phoneTopGap=110 (no rebuild, no tokens.json write).
+const SPACING_OVERRIDES = ["heroTopGap", "headlineGap", "phoneTopGap", "phoneToBadgeGap"] as const;
+type SpacingOverride = (typeof SPACING_OVERRIDES)[number];
+
+function useSpacingOverrides(): [Partial<Record<SpacingOverride, number>>, boolean] {
+  const [overrides, setOverrides] = React.useState<Partial<Record<SpacingOverride, number>>>({});
+  const [parsed, setParsed] = React.useState(false);
+  React.useEffect(() => {
+    const params = new URLSearchParams(window.location.search);
+    const next: Partial<Record<SpacingOverride, number>> = {};
+    for (const key of SPACING_OVERRIDES) {
+      const raw = params.get(`spacing.${key}`);
+      if (raw !== null && raw.trim() !== "" && Number.isFinite(Number(raw))) next[key] = Number(raw);
+    }
+    if (Object.keys(next).length) setOverrides(next);
+    setParsed(true);
+  }, []);
+  return [overrides, parsed];
+}
+
+// QA page-ready marker: <html data-qa-ready="1"> once URL overrides are applied,
+// fonts and images are decoded, videos have a frame and finite animations are done.
+// Screenshots wait on this instead of network idle.
+function useQaReadyMarker(active: boolean) {
+  React.useEffect(() => {
+    if (!active) return;
+    let cancelled = false;
+    const images = Array.from(document.images).map((img) =>
+      img.complete ? Promise.resolve() : img.decode().catch(() => undefined),
+    );
+    const videos = Array.from(document.querySelectorAll("video")).map((v) =>
+      v.readyState >= 2
+        ? Promise.resolve()
+        : new Promise<void>((resolve) => {
+            v.addEventListener("loadeddata", () => resolve(), { once: true });
+            v.addEventListener("error", () => resolve(), { once: true });
+          }),
+    );
+    const finiteAnimations = () =>
+      document
+        .getAnimations()
+        .filter((a) => Number.isFinite(Number(a.effect?.getComputedTiming().endTime)))
+        .map((a) => a.finished.catch(() => undefined));
+    Promise.all([document.fonts.ready, ...images, ...videos])
+      .then(() => Promise.all(finiteAnimations()))
+      .then(() => {
+        // two frames: the last layout/paint has landed before we signal
+        requestAnimationFrame(() =>
+          requestAnimationFrame(() => {
+            if (!cancelled) document.documentElement.dataset.qaReady = "1";
+          }),
+        );
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [active]);
+}
+
+export default function HeroWithTimeline({ props: baseProps }: { props: HeroMinimalProps }) {
   const [isMobile, setIsMobile] = React.useState(false);
+  const [overrides, overridesParsed] = useSpacingOverrides();
+  useQaReadyMarker(overridesParsed);
+
+  // headingBlockHeight already contains ceil(headlineGap); shift it with the override
+  const props: HeroMinimalProps = {
+    ...baseProps,
+    ...overrides,
+    headingBlockHeight:
+      baseProps.headingBlockHeight +
+      (overrides.headlineGap !== undefined
+        ? Math.ceil(overrides.headlineGap) - Math.ceil(baseProps.headlineGap)
+        : 0),
+  };
 
   React.useEffect(() => {
     const update = () => {
@@ -62,7 +62,14 @@ export default function TimedCopy({
 }: Props) {
   const cues = useMemo(() => (timeline?.cues || []).slice().sort((a, b) => a.start - b.start), [timeline]);
   const hasVideo = Boolean(timeline.src);
-  const fade = Math.max(0, (timeline.fadeMs ?? 500)) / 1000;
+
+  // QA timeline captures seek the video to each cue and pass ?qa.fadeMs=0 to skip cross-fades
+  const [fadeOverride, setFadeOverride] = useState<number | null>(null);
+  useEffect(() => {
+    const raw = new URLSearchParams(window.location.search).get("qa.fadeMs");
+    if (raw !== null && raw.trim() !== "" && Number.isFinite(Number(raw))) setFadeOverride(Number(raw));
+  }, []);
+  const fade = Math.max(0, (fadeOverride ?? timeline.fadeMs ?? 500)) / 1000;
 
   // ----- media (stable) -----
   const videoRef = useRef<HTMLVideoElement | null>(null);
@@ -68,7 +68,10 @@ interface TimelineFile {
 }
 
 // ---------- FS helpers ----------
-const root = path.resolve(process.cwd(), "../"); // repo root
+// repo root, or a batch worker's spec workspace (SEEME_WORKSPACE, see agents/batch.py)
+const root = process.env.SEEME_WORKSPACE
+  ? path.resolve(process.env.SEEME_WORKSPACE)
+  : path.resolve(process.cwd(), "../");
 
 function readJson<T>(relPath: string): T {
   const p = path.join(root, relPath);
@@ -0,0 +1,74 @@
+from agents.tools.gap_search import next_value, next_values
+
+LO, HI = 0, 96
+
+def peak_at(x0):
+    return lambda v: 1.0 - ((v - x0) / 100) ** 2
+
+def run_sequential(score, start, max_iter=30, **kw):
+    history = [(start, score(start))]
+    for _ in range(max_iter):
+        v, why = next_value(history, LO, HI, **kw)
+        if v is None:
+            return history, why
+        history.append((v, score(v)))
+    raise AssertionError(f"no convergence in {max_iter} steps: {history}")
+
+def best(history):
+    return max(history, key=lambda p: p[1])[0]
+
+def test_empty_history():
+    assert next_value([], LO, HI) == (None, "no history")
+    assert next_values([], 4, LO, HI) == ([], "no history")
+
+def test_converges_to_peak():
+    for start, peak in ((8, 24), (60, 13), (0, 0), (96, 96)):
+        history, why = run_sequential(peak_at(peak), start)
+        assert best(history) == peak, (start, peak, history)
+        assert why.startswith("converged")
+
+def test_stays_in_bounds_and_never_repeats():
+    history, _ = run_sequential(peak_at(200), 90)
+    values = [v for v, _ in history]
+    assert best(history) == HI
+    assert all(LO <= v <= HI for v in values)
+    assert len(values) == len(set(values))
+
+def test_first_step_probes_up_by_step():
+    assert next_value([(8, 0.5)], LO, HI, step=4) == (12, "probe")
+
+def test_deadband_stalls_flat_tail():
+    history = [(8, 0.90), (12, 0.95), (16, 0.9501), (20, 0.9502), (24, 0.9503)]
+    v, why = next_value(history, LO, HI, deadband=0.01)
+    assert v is None and why.startswith("stalled")
+    # without a deadband the same history keeps searching
+    assert next_value(history, LO, HI)[0] is not None
+
+def test_deadband_needs_four_points():
+    history = [(8, 0.90), (12, 0.9001), (16, 0.9002)]
+    assert next_value(history, LO, HI, deadband=0.01)[0] is not None
+
+def test_batch_values_are_untested_and_in_bounds():
+    history = [(8, peak_at(24)(8))]
+    values, why = next_values(history, 4, LO, HI)
+    assert len(values) == 4 and why.startswith("batch")
+    assert len(set(values)) == 4
+    assert all(LO <= v <= HI and v != 8 for v in values)
+
+def test_batch_converges_to_peak():
+    score = peak_at(37)
+    history = [(8, score(8))]
+    for _ in range(10):
+        values, why = next_values(history, 4, LO, HI)
+        if not values:
+            break
+        history += [(v, score(v)) for v in values]
+    else:
+        raise AssertionError(f"no convergence: {history}")
+    assert best(history) == 37
+    assert why.startswith("converged")
+
+def test_batch_stops_with_deadband():
+    history = [(8, 0.90), (12, 0.95), (16, 0.9501), (20, 0.9502), (24, 0.9503)]
+    values, why = next_values(history, 4, LO, HI, deadband=0.01)
+    assert values == [] and why.startswith("stalled")
@@ -0,0 +1,98 @@
+import pytest
+
+from agents import llm
+from agents.llm_cache import LLMCache, ReplayMiss, request_key
+
+MESSAGES = [{"role": "system", "content": "s"}, {"role": "user", "content": "u"}]
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.delenv("LLM_CACHE_PATH", raising=False)
+    c = LLMCache(tmp_path / "llm.sqlite", ttl=60, max_entries=3)
+    yield c
+    c.close()
+
+def age(cache, key, seconds):
+    db = cache._conn()
+    db.execute("UPDATE responses SET created = created - ?, accessed = accessed - ? WHERE key = ?",
+               (seconds, seconds, key))
+    db.commit()
+
+def rows(cache):
+    return cache._conn().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+def test_key_covers_every_input():
+    k = request_key("m", MESSAGES, 0.2)
+    assert k == request_key("m", [dict(m) for m in MESSAGES], 0.2)
+    assert k != request_key("m2", MESSAGES, 0.2)
+    assert k != request_key("m", MESSAGES, 0.3)
+    assert k != request_key("m", MESSAGES, 0.2, {"type": "json_object"})
+
+def test_put_get(cache):
+    cache.put("k", "m", "v")
+    assert cache.get("k") == "v"
+    assert cache.get("other") is None
+    assert cache.stats == {"hits": 1, "misses": 1}
+
+def test_ttl_expires_and_deletes(cache):
+    cache.put("k", "m", "v")
+    age(cache, "k", 120)
+    assert cache.get("k") is None
+    assert rows(cache) == 0
+
+def test_no_expiry_reads_old_rows_without_writing(cache):
+    cache.put("k", "m", "v")
+    age(cache, "k", 10 * 24 * 3600)
+    before = cache._conn().execute("SELECT accessed FROM responses WHERE key = 'k'").fetchone()
+    assert cache.get("k", expire=False) == "v"
+    assert cache._conn().execute("SELECT accessed FROM responses WHERE key = 'k'").fetchone() == before
+    assert rows(cache) == 1
+
+def test_zero_ttl_never_expires(tmp_path, monkeypatch):
+    monkeypatch.delenv("LLM_CACHE_PATH", raising=False)
+    c = LLMCache(tmp_path / "llm.sqlite", ttl=0)
+    c.put("k", "m", "v")
+    age(c, "k", 10 ** 9)
+    assert c.get("k") == "v"
+    c.close()
+
+def test_size_eviction_keeps_most_recently_used(cache):
+    for i in range(3):
+        cache.put(f"k{i}", "m", str(i))
+        age(cache, f"k{i}", 30 - i)  # k0 oldest
+    assert cache.get("k0") == "0"  # touched: now the most recent
+    cache.put("k3", "m", "3")
+    assert cache.get("k1") is None
+    assert {k: cache.get(k) for k in ("k0", "k2", "k3")} == {"k0": "0", "k2": "2", "k3": "3"}
+
+@pytest.fixture
+def shared(cache, monkeypatch):
+    monkeypatch.setattr(llm, "_cache", cache)
+    return cache
+
+def test_replay_serves_expired_recordings(shared):
+    key = request_key("m", MESSAGES, 0.2)
+    shared.put(key, "m", "recorded")
+    age(shared, key, 10 * 24 * 3600)
+    client = llm.LLM("m", mode="replay")
+    assert client._chat(MESSAGES, 0.2) == "recorded"
+    assert client._chat(MESSAGES, 0.2) == "recorded"
+    assert rows(shared) == 1
+
+def test_replay_miss_raises(shared):
+    with pytest.raises(ReplayMiss):
+        llm.LLM("m", mode="replay")._chat(MESSAGES, 0.2)
+
+def test_cache_mode_expires(shared):
+    key = request_key("m", MESSAGES, 0.2)
+    shared.put(key, "m", "stale")
+    age(shared, key, 120)
+    hit = llm.LLM("m", mode="cache")._lookup(MESSAGES, 0.2, None, None)[1]
+    assert hit is None
+    assert rows(shared) == 0
+
+def test_stub_mode_skips_cache(shared):
+    schema = {"properties": {"done": {"default": True}, "x": {}}}
+    assert llm.LLM("m", mode="stub")._chat(MESSAGES, 0.2, schema=schema) == '{"done": true}'
+    assert llm.LLM("m", mode="stub")._chat(MESSAGES, 0.2) == ""
+    assert rows(shared) == 0
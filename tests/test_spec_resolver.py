@@ -0,0 +1,89 @@
+from agents.tools.io_tools import read_json
+from agents.tools.roi import FLOW, dirty_regions
+from agents.tools.spec_resolver import WHOLE, ResolvedSpec, changed_paths
+
+ALL = {*FLOW, "background"}
+
+UI = {
+    "hero": {
+        "header": {"title": "$copy.headline", "selector": "h1"},
+        "centerpiece": {"width": "$spacing.phoneWidth"},
+        "badge": {"width": "$spacing.badgeWidth", "missing": "$spacing.nope"},
+        "layout": {"headlineGap": "$spacing.headlineGap", "phoneToBadgeGap": "$spacing.phoneToBadgeGap"},
+        "items": ["$colors.bgTop"],
+    }
+}
+TOKENS = {
+    "spacing": {"phoneWidth": 230, "badgeWidth": 120, "headlineGap": 8, "phoneToBadgeGap": 48,
+                "phoneScreenInsetBase": {"top": 4}},
+    "colors": {"bgTop": "#F7B267"},
+    "typography": {"h1": {"px": 48}},
+}
+COPY = {"headline": "See me"}
+
+def spec():
+    return ResolvedSpec(UI, TOKENS, COPY)
+
+def test_resolves_refs_without_touching_inputs():
+    rs = spec()
+    assert rs.get("hero", "header", "title") == "See me"
+    assert rs.get("hero", "centerpiece", "width") == 230
+    assert rs.get("hero", "items", 0) == "#F7B267"
+    assert rs.get("hero", "header", "selector") == "h1"
+    assert rs.unresolved == {("hero", "badge", "missing"): "$spacing.nope"}
+    assert UI["hero"]["centerpiece"]["width"] == "$spacing.phoneWidth"
+
+def test_update_reresolves_only_dependents():
+    rs = spec()
+    assert rs.update("spacing.phoneWidth", 240) == ["/hero/centerpiece/width"]
+    assert rs.get("hero", "centerpiece", "width") == 240
+    assert rs.get("hero", "badge", "width") == 120
+    assert TOKENS["spacing"]["phoneWidth"] == 230  # the spec holds its own copy
+
+def test_update_copy_token():
+    rs = spec()
+    assert rs.update(("copy", "headline"), "Hello") == ["/hero/header/title"]
+    assert rs.get("hero", "header", "title") == "Hello"
+
+def test_update_parent_token_reaches_every_child_ref():
+    rs = spec()
+    spacing = {**TOKENS["spacing"], "phoneWidth": 200, "badgeWidth": 100}
+    affected = rs.update("spacing", spacing)
+    assert "/hero/centerpiece/width" in affected and "/hero/badge/width" in affected
+    assert rs.get("hero", "badge", "width") == 100
+
+def test_update_unreferenced_token_is_whole_document():
+    rs = spec()
+    assert rs.update("typography.h1.px", 56) == [WHOLE]
+    assert rs.update("spacing.phoneScreenInsetBase.top", 6) == [WHOLE]
+
+def test_update_unresolved_ref_resolves_later():
+    rs = spec()
+    assert rs.update("spacing.nope", 5) == ["/hero/badge/missing"]
+    assert rs.get("hero", "badge", "missing") == 5
+    assert rs.unresolved == {}
+
+def test_changed_paths():
+    old = {"a": {"b": 1, "c": 2}, "d": 3}
+    new = {"a": {"b": 1, "c": 5}, "e": 4}
+    assert sorted(changed_paths(old, new)) == [("a", "c"), ("d",), ("e",)]
+
+def test_dirty_regions_follow_flow():
+    assert dirty_regions(["/hero/badge/width"]) == {"badge", "background"}
+    assert dirty_regions(["/hero/centerpiece/width"]) == {"centerpiece", "badge", "background"}
+    assert dirty_regions(["/hero/layout/phoneToBadgeGap"]) == {"badge", "background"}
+    assert dirty_regions(["/hero/tuning/deadband"]) == {"background"}
+    assert dirty_regions([]) == {"background"}
+
+def test_dirty_regions_whole_document_and_outside_hero():
+    assert dirty_regions([WHOLE]) == ALL
+    assert dirty_regions(["/footer/text"]) == ALL
+    assert dirty_regions(["/hero/unknown/x"]) == ALL
+
+def test_headline_gap_dirties_every_region():
+    # headlineGap moves the header, and everything below it in the flow moves with it
+    rs = ResolvedSpec(read_json("specs/ui_spec.json"), read_json("specs/tokens.json"), read_json("specs/copy.json"))
+    affected = rs.update("spacing.headlineGap", 12)
+    assert affected == ["/hero/layout/headlineGap"]
+    assert dirty_regions(affected) == ALL
+    assert dirty_regions(spec().update("typography.h1.px", 56)) == ALL
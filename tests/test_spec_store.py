@@ -0,0 +1,117 @@
+import json, os
+
+import pytest
+
+from agents.tools.io_tools import WORKSPACE_ENV
+from agents.tools.spec_store import BOM, SpecStore, atomic_write_bytes, compile_pointer, set_pointer
+
+REL = "specs/tokens.json"
+
+@pytest.fixture
+def ws(tmp_path, monkeypatch):
+    """A throwaway workspace: specs/ resolves under tmp_path."""
+    monkeypatch.setenv(WORKSPACE_ENV, str(tmp_path))
+    (tmp_path / "specs").mkdir()
+    return tmp_path
+
+def test_atomic_write_replaces_whole_file(tmp_path):
+    p = tmp_path / "a" / "f.json"
+    atomic_write_bytes(p, b"one")
+    atomic_write_bytes(p, b"two")
+    assert p.read_bytes() == b"two"
+    assert os.listdir(p.parent) == ["f.json"]  # no temp files left behind
+
+def test_atomic_write_failure_keeps_old_file(tmp_path, monkeypatch):
+    p = tmp_path / "f.json"
+    p.write_bytes(b"old")
+
+    def boom(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(os, "replace", boom)
+    with pytest.raises(OSError):
+        atomic_write_bytes(p, b"new")
+    assert p.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["f.json"]
+
+def test_read_returns_private_copy(ws):
+    (ws / REL).write_text(json.dumps({"spacing": {"headlineGap": 8}}), "utf-8")
+    s = SpecStore()
+    doc = s.read(REL)
+    doc["spacing"]["headlineGap"] = 99
+    assert s.read(REL)["spacing"]["headlineGap"] == 8
+
+def test_write_preserves_bom(ws):
+    p = ws / REL
+    p.write_bytes((BOM + json.dumps({"a": 1})).encode("utf-8"))
+    s = SpecStore()
+    assert s.read(REL) == {"a": 1}
+    s.write(REL, {"a": 2})
+    text = p.read_bytes().decode("utf-8")
+    assert text.startswith(BOM)
+    assert json.loads(text[1:]) == {"a": 2}
+
+def test_write_without_bom_adds_none(ws):
+    SpecStore().write(REL, {"a": 1})
+    assert not (ws / REL).read_bytes().decode("utf-8").startswith(BOM)
+
+def test_identical_write_is_skipped(ws):
+    s = SpecStore()
+    s.write(REL, {"a": 1})
+    mtime = (ws / REL).stat().st_mtime_ns
+    s.write(REL, {"a": 1})
+    assert s.stats["skipped_writes"] == 1
+    assert (ws / REL).stat().st_mtime_ns == mtime
+
+def test_external_edit_is_seen(ws):
+    s = SpecStore()
+    s.write(REL, {"a": 1})
+    (ws / REL).write_text(json.dumps({"a": 2, "b": 3}), "utf-8")
+    assert s.read(REL) == {"a": 2, "b": 3}
+
+def test_batch_stages_until_outermost_exit(ws):
+    s = SpecStore()
+    s.write(REL, {"a": 1})
+    with s.batch():
+        s.write(REL, {"a": 2})
+        with s.batch():
+            s.write(REL, {"a": 3})
+        assert json.loads((ws / REL).read_text("utf-8")) == {"a": 1}
+        assert s.read(REL) == {"a": 3}  # reads see staged writes
+    assert json.loads((ws / REL).read_text("utf-8")) == {"a": 3}
+
+def test_failed_batch_discards_writes(ws):
+    s = SpecStore()
+    s.write(REL, {"a": 1})
+    with pytest.raises(RuntimeError):
+        with s.batch():
+            s.write(REL, {"a": 2})
+            raise RuntimeError
+    assert s.read(REL) == {"a": 1}
+
+@pytest.mark.parametrize("pointer, tokens", [
+    ("", ()),
+    ("/", ("",)),
+    ("/hero/layout/phoneTopGap", ("hero", "layout", "phoneTopGap")),
+    ("/a~1b/c~0d", ("a/b", "c~d")),
+    ("/~01", ("~1",)),  # ~1 is unescaped after ~0, never before
+    ("/items/0", ("items", "0")),
+    ("/a//b", ("a", "", "b")),
+])
+def test_compile_pointer(pointer, tokens):
+    assert compile_pointer(pointer) == tokens
+
+def test_compile_pointer_requires_leading_slash():
+    with pytest.raises(ValueError):
+        compile_pointer("hero/layout")
+
+def test_set_pointer():
+    doc = {"hero": {"layout": {}}, "items": [1, 2], "a/b": {}}
+    set_pointer(doc, compile_pointer("/hero/layout/phoneTopGap"), 120)
+    set_pointer(doc, compile_pointer("/items/0"), 9)
+    set_pointer(doc, compile_pointer("/items/-"), 3)
+    set_pointer(doc, compile_pointer("/a~1b/x"), True)
+    assert doc == {"hero": {"layout": {"phoneTopGap": 120}}, "items": [9, 2, 3], "a/b": {"x": True}}
+    with pytest.raises(ValueError):
+        set_pointer(doc, compile_pointer(""), {})
+    with pytest.raises(KeyError):
+        set_pointer(doc, compile_pointer("/missing/key"), 1)
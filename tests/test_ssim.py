@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from agents.tools.ssim import auto_scale, downsample, ms_ssim, prepare, ssim, ssim_maps, to_luma
+
+KEYS = {"ssim", "tiles", "scale", "map", "rejected"}
+
+def image(h=240, w=320, seed=0):
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:h, 0:w]
+    base = (x / w * 180 + y / h * 60)[..., None] + rng.normal(0, 12, (h, w, 1))
+    img = np.clip(np.repeat(base, 3, axis=2), 0, 255).astype(np.uint8)
+    img[h // 3: h // 3 + h // 8, w // 4: 3 * w // 4] = 255
+    return img
+
+def reference_ssim(a, b, win=7, window="box", sigma=1.5):
+    """Straightforward per-window SSIM (mean over all valid windows)."""
+    if window == "gaussian":
+        r = np.arange(win) - (win - 1) / 2
+        k = np.exp(-(r * r) / (2 * sigma * sigma))
+        w2 = np.outer(k, k) / np.outer(k, k).sum()
+    else:
+        w2 = np.full((win, win), 1 / (win * win))
+    a, b = a.astype(np.float64), b.astype(np.float64)
+    out = []
+    for i in range(a.shape[0] - win + 1):
+        for j in range(a.shape[1] - win + 1):
+            pa, pb = a[i:i + win, j:j + win], b[i:i + win, j:j + win]
+            ma, mb = (w2 * pa).sum(), (w2 * pb).sum()
+            va, vb = (w2 * pa * pa).sum() - ma * ma, (w2 * pb * pb).sum() - mb * mb
+            cov = (w2 * pa * pb).sum() - ma * mb
+            out.append((2 * ma * mb + 1e-4) * (2 * cov + 9e-4) / ((ma * ma + mb * mb + 1e-4) * (va + vb + 9e-4)))
+    return float(np.mean(out))
+
+@pytest.mark.parametrize("window", ["box", "gaussian"])
+def test_identical_images_score_one(window):
+    a = image()
+    res = ssim(a, a, window=window)
+    assert set(res) == KEYS
+    assert res["ssim"] == pytest.approx(1.0, abs=1e-5)
+    assert np.allclose(res["tiles"], 1.0, atol=1e-4)
+    assert res["rejected"] is False
+
+@pytest.mark.parametrize("window", ["box", "gaussian"])
+def test_matches_reference(window):
+    a = to_luma(image(48, 64))
+    b = to_luma(np.roll(image(48, 64), 2, axis=0))
+    m, _ = ssim_maps(a, b, window=window)
+    assert float(m.mean()) == pytest.approx(reference_ssim(a, b, window=window), abs=1e-4)
+
+def test_box_and_gaussian_windows_differ_but_agree_on_ordering():
+    a = image()
+    near, far = np.roll(a, 2, axis=0), np.roll(a, 12, axis=0)
+    for window in ("box", "gaussian"):
+        assert ssim(a, near, window=window)["ssim"] > ssim(a, far, window=window)["ssim"]
+    assert ssim(a, near, window="box")["ssim"] != pytest.approx(ssim(a, near, window="gaussian")["ssim"], abs=1e-6)
+
+def test_shift_lowers_score_and_tiles_shape():
+    a = image()
+    res = ssim(a, np.roll(a, 6, axis=0), tiles=(4, 5))
+    assert 0 < res["ssim"] < 0.99
+    assert len(res["tiles"]) == 4 and all(len(row) == 5 for row in res["tiles"])
+
+def test_prepared_target_matches_direct():
+    a, b = image(), np.roll(image(), 3, axis=1)
+    assert ssim(a, prepared_b=prepare(b))["ssim"] == pytest.approx(ssim(a, b)["ssim"], abs=1e-6)
+
+def test_shape_mismatch():
+    with pytest.raises(ValueError):
+        ssim(image(), image(200, 320))
+
+def test_scale_and_downsample():
+    assert auto_scale(720, 1280) == 3 and auto_scale(100, 100) == 1
+    x = np.arange(25, dtype=np.float32).reshape(5, 5)
+    assert downsample(x, 2).shape == (2, 2)
+    assert ssim(image(720, 1280), image(720, 1280))["scale"] == 3
+
+def test_reject_below_keeps_result_shape():
+    a = image(480, 640)
+    b = np.roll(a, 40, axis=0)
+    full = ssim(a, b)
+    rej = ssim(a, b, reject_below=0.999)
+    assert set(rej) == KEYS and rej["rejected"] is True
+    assert rej["scale"] == full["scale"] * 4
+    assert rej["map"].shape[0] < full["map"].shape[0]
+    assert len(rej["tiles"]) == 8
+    kept = ssim(a, a, reject_below=0.5)
+    assert kept["rejected"] is False and kept["scale"] == full["scale"]
+
+def test_ms_ssim():
+    a = image(480, 640)
+    same = ms_ssim(a, a)
+    assert set(same) == KEYS | {"levels"}
+    assert same["ssim"] == pytest.approx(1.0, abs=1e-5)
+    shifted = ms_ssim(a, np.roll(a, 6, axis=0))
+    assert 0 < shifted["ssim"] < 1
+    assert shifted["map"].shape == ssim(a, a)["map"].shape  # finest level, same as ssim
+    assert ms_ssim(a, np.roll(a, 40, axis=0), reject_below=0.999)["rejected"] is True
+    with pytest.raises(ValueError):
+        ms_ssim(image(7, 7), image(7, 7))